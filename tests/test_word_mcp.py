@@ -0,0 +1,153 @@
+import copy
+import io
+import os
+
+import orjson
+import pytest
+from docx import Document
+from docx.oxml.ns import qn
+from PIL import Image
+
+import word_mcp
+
+
+@pytest.fixture
+def docx_path(tmp_path):
+    path = tmp_path / "doc.docx"
+    doc = Document()
+    doc.add_paragraph("hello world")
+    doc.add_paragraph("第二段 hello")
+    doc.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def image_docx_path(docx_path):
+    # 一张普通的行内图片, 以及一张位于超链接内、doc.inline_shapes 不计入的图片
+    image = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(image, 'PNG')
+    doc = Document(docx_path)
+    run = doc.paragraphs[0].add_run()
+    run.add_picture(image)
+    hyperlink = doc.paragraphs[1]._p.makeelement(qn('w:hyperlink'))
+    hyperlink.append(copy.deepcopy(run._r))
+    doc.paragraphs[1]._p.append(hyperlink)
+    doc.save(docx_path)
+    assert len(Document(docx_path).inline_shapes) == 1
+    return docx_path
+
+
+def _data(response):
+    result = orjson.loads(response)
+    assert result["status"] == "success", result
+    return result["data"]
+
+
+def test_findall_each_empty_texts():
+    pattern = word_mcp._compiled('contains', '', 0)
+    assert list(word_mcp._findall_each(pattern, [])) == []
+
+
+def test_complex_query_empty_contains(docx_path):
+    data = _data(word_mcp.complex_query(docx_path, "contains:"))
+    # 空查询在每段的每个位置各匹配一次空串
+    assert [d["index"] for d in data["details"]] == [0, 1]
+    assert data["total"] == len("hello world") + 1 + len("第二段 hello") + 1
+
+
+def test_complex_query_contains_without_tables(docx_path):
+    data = _data(word_mcp.complex_query(docx_path, "contains:hello"))
+    assert data["total"] == 2
+    assert {d["type"] for d in data["details"]} == {"paragraph"}
+
+
+def test_complex_query_contains_in_tables(docx_path):
+    doc = Document(docx_path)
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 1).text = "Hello 表格"
+    doc.save(docx_path)
+
+    data = _data(word_mcp.complex_query(docx_path, "contains:hello"))
+    assert data["total"] == 3
+    assert [d["position"] for d in data["details"] if d["type"] == "table"] == ["Table-0 Cell(0,1)"]
+
+
+def test_query_document_info_counts_inline_shapes(image_docx_path):
+    data = _data(word_mcp.query_document_info(image_docx_path))
+    assert data["images"] == 1
+
+
+def test_complex_query_counts_inline_shapes(image_docx_path):
+    data = _data(word_mcp.complex_query(image_docx_path, "images"))
+    assert data["elements"]["images"] == 1
+
+
+def test_failed_edit_leaves_pending_document_unchanged(docx_path):
+    assert orjson.loads(word_mcp.add_text_to_document(docx_path, "pending"))["status"] == "success"
+    pending = word_mcp._BATCHER.get(docx_path)
+    assert pending is not None
+    before = pending.element.xml
+
+    # 样式不存在、文本含 XML 不允许的字符: 都应在修改正文之前失败
+    assert orjson.loads(word_mcp.insert_table(docx_path, 2, 2, style="No Such Style"))["status"] == "error"
+    assert orjson.loads(word_mcp.add_text_to_document(docx_path, "bad\x00", paragraph_index=0))["status"] == "error"
+    assert orjson.loads(word_mcp.format_text_in_document(docx_path, 0, font_name="bad\x00"))["status"] == "error"
+    assert word_mcp._BATCHER.get(docx_path) is pending
+    assert pending.element.xml == before
+
+    word_mcp._BATCHER.flush(docx_path)
+    doc = Document(docx_path)
+    assert [p.text for p in doc.paragraphs] == ["hello world", "第二段 hello", "pending"]
+    assert not doc.tables
+
+
+def test_in_place_write_includes_pending_edits(docx_path):
+    word_mcp.add_text_to_document(docx_path, "pending hello")
+    data = _data(word_mcp.find_and_replace_text(docx_path, "hello", "bye"))
+    assert data["replace_count"] == 3
+    assert word_mcp._BATCHER.get(docx_path) is None
+    assert [p.text for p in Document(docx_path).paragraphs] == ["bye world", "第二段 bye", "pending bye"]
+
+
+def test_in_place_write_keeps_symlink(docx_path, tmp_path):
+    link = tmp_path / "link.docx"
+    link.symlink_to(docx_path)
+    _data(word_mcp.edit_paragraph_in_document(str(link), 0, "via link"))
+    assert link.is_symlink()
+    assert Document(docx_path).paragraphs[0].text == "via link"
+
+
+@pytest.mark.parametrize("alias", [False, True])
+def test_cached_document_sees_in_place_edit(docx_path, tmp_path, alias):
+    edit_path = docx_path
+    if alias:
+        edit_path = str(tmp_path / "alias.docx")
+        os.symlink(docx_path, edit_path)
+
+    assert _data(word_mcp.complex_query(docx_path, "contains:hello"))["total"] == 2
+    cached = word_mcp._load_doc(docx_path)
+
+    # 替换文本与原文等长, 文件大小可能不变, 只能依靠写入时丢弃缓存
+    _data(word_mcp.edit_paragraph_in_document(edit_path, 0, "howdy world"))
+    assert word_mcp._load_doc(docx_path) is not cached
+    data = _data(word_mcp.complex_query(docx_path, "contains:hello"))
+    assert data["total"] == 1
+    assert data["details"][0]["index"] == 1
+
+
+@pytest.mark.parametrize("replace, count, expected", [
+    # 无大小写之分的查找文本走字面替换, 其余仍按不区分大小写的正则替换
+    ("contains:第二段=第2段", 1, ["hello world", "第2段 hello"]),
+    ("contains:HELLO=hi", 2, ["hi world", "第二段 hi"]),
+    ("keyword:world=earth", 1, ["hello earth", "第二段 hello"]),
+])
+def test_complex_replace(docx_path, tmp_path, replace, count, expected):
+    doc = Document(docx_path)
+    doc.paragraphs[1].runs[0].bold = True
+    doc.save(docx_path)
+
+    output_path = str(tmp_path / "out.docx")
+    assert _data(word_mcp.complex_replace(docx_path, replace, output_path))["replace_count"] == count
+    paragraphs = Document(output_path).paragraphs
+    assert [p.text for p in paragraphs] == expected
+    assert paragraphs[1].runs[0].bold
@@ -1,32 +1,614 @@
+import copy
 import csv
 import difflib
+import html
+import io
 import os
-import json
+import asyncio
+import atexit
+import bisect
+import logging
+import multiprocessing
 import re
-import jieba
-
-from collections import Counter
+import shutil
+import tempfile
+import threading
+import zipfile
+import numpy as np
+import orjson
+
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from itertools import accumulate
 from mcp.server.fastmcp import FastMCP
-from typing import List
+from typing import Iterator, List
 from docx import Document
-from docx.shared import Pt, RGBColor, Cm
+from docx.shared import Length, Pt, RGBColor, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
 from docx.enum.section import WD_ORIENTATION
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
-from reportlab.lib.fonts import addMapping
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-from PyPDF2 import PdfReader
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml.ns import nsdecls, nsmap, qn
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.table import CT_Tbl
+from docx.table import Table, _Cell
+from docx.text.paragraph import Paragraph
+from docxcompose.composer import Composer
+import lxml.html
+from lxml import etree
+import pymupdf
+
+try:
+    # 可选依赖: 安装后对比文档时使用 C++ 实现的编辑距离对齐, 否则回退到 difflib
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    Levenshtein = None
 
 mcp = FastMCP("word_mcp", log_level="ERROR")
+logger = logging.getLogger("word_mcp")
+
+# 相对路径的根目录, 取环境变量 WORD_MCP_PATH, 未设置时使用默认桌面路径; 只在导入时解析一次
+_DEFAULT_BASE_PATH = os.environ.get('WORD_MCP_PATH') or os.path.join(os.path.expanduser('~'), '桌面')
+
+
+def _resolve(file_path: str) -> str:
+    """
+    将相对路径解析到输出目录下, 绝对路径原样返回
+    """
+    return file_path if os.path.isabs(file_path) else os.path.join(_DEFAULT_BASE_PATH, file_path)
+
+# PDF 导出使用 PyMuPDF 内置的中文无衬线字体(嵌入子集), 解决中文乱码问题
+_PDF_FONT = 'cjk'
+_PDF_FONT_SIZE = 10
+_PDF_LEADING = 12
+_PDF_PARAGRAPH_SPACING = 14.4
+_PDF_MARGIN = 72
+
+# 已解析文档的 LRU 缓存, 键为 (路径, 修改时间, 文件大小), 避免每次调用都重新解压并解析 docx;
+# 加入文件大小可识别修改时间精度不足时被外部程序改写的文件
+_DOC_CACHE_SIZE = 32
+_DOC_CACHE = OrderedDict()
+_DOC_LOCK = threading.RLock()
+
+
+def _doc_key(file_path: str) -> tuple[str, int, int]:
+    # 以真实路径为键, 经符号链接访问与直接访问同一文件时共用缓存, 写入后也一并丢弃
+    file_path = os.path.realpath(file_path)
+    st = os.stat(file_path)
+    return file_path, st.st_mtime_ns, st.st_size
+
+
+def _cache_doc(key: tuple[str, int, int], doc) -> None:
+    with _DOC_LOCK:
+        _DOC_CACHE[key] = doc
+        _DOC_CACHE.move_to_end(key)
+        while len(_DOC_CACHE) > _DOC_CACHE_SIZE:
+            _DOC_CACHE.popitem(last=False)
+
+
+def _load_doc(file_path: str):
+    """
+    读取Word文档, 文件未被修改时复用缓存中的 Document 对象
+    """
+    pending = _BATCHER.get(file_path)
+    if pending is not None:
+        return pending
+
+    key = _doc_key(file_path)
+    with _DOC_LOCK:
+        doc = _DOC_CACHE.get(key)
+        if doc is not None:
+            _DOC_CACHE.move_to_end(key)
+            return doc
+
+    doc = Document(file_path)
+    _cache_doc(key, doc)
+    return doc
+
+
+def _atomic_write(file_path: str, write) -> None:
+    """
+    先写入同目录下的临时文件, 成功后再原子替换目标文件, 写入中途出错不会损坏原文件;
+    目标为符号链接时替换其指向的文件, 链接本身保留. 替换后文件为新的 inode, 其他硬链接仍指向旧内容
+
+    :param file_path: 目标文件路径
+    :param write: 接收已打开的二进制文件对象并写入内容的函数
+    """
+    file_path = os.path.realpath(file_path)
+    directory, name = os.path.split(file_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb', buffering=1 << 20) as f:
+            write(f)
+        if os.path.exists(file_path):
+            # mkstemp 创建的文件权限为 0600, 沿用原文件的权限
+            shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _atomic_save(doc, file_path: str) -> None:
+    """
+    原子地保存文档, 见 _atomic_write
+    """
+    _atomic_write(file_path, doc.save)
+
+
+def _save_doc(doc, file_path: str) -> None:
+    """
+    保存Word文档, 并以新的修改时间重新登记缓存
+    """
+    with _DOC_LOCK:
+        _evict_doc(file_path)
+        _atomic_save(doc, file_path)
+        # 写盘成功后才移出待保存列表, 失败时修改仍保留在内存中
+        _BATCHER.discard(file_path)
+        _cache_doc(_doc_key(file_path), doc)
+
+
+def _evict_doc(file_path: str) -> None:
+    """
+    丢弃指定文件的缓存（例如修改了文档但未保存时）, 已登记待保存的修改不受影响
+    """
+    file_path = os.path.realpath(file_path)
+    with _DOC_LOCK:
+        for key in [k for k in _DOC_CACHE if k[0] == file_path]:
+            del _DOC_CACHE[key]
+
+
+def _write_file(file_path: str, write) -> None:
+    """
+    在批量保存之外直接改写磁盘上的文档: 先写回该文件尚未保存的修改, 再原子写入, 最后丢弃缓存
+
+    :param file_path: 目标文件路径
+    :param write: 接收已打开的二进制文件对象并写入内容的函数
+    """
+    with _DOC_LOCK:
+        _BATCHER.flush(file_path)
+        _atomic_write(file_path, write)
+        _evict_doc(file_path)
+
+
+def _write_doc(doc, file_path: str) -> None:
+    """
+    保存在批量保存之外修改的文档, 见 _write_file
+    """
+    _write_file(file_path, doc.save)
+
+
+class DocBatcher:
+    """
+    合并同一文档的连续保存: 修改直接作用于缓存中的 Document,
+    首次修改后等待 max_wait_ms, 期间的所有修改只写回磁盘一次
+    """
+
+    def __init__(self, max_wait_ms: int = 50):
+        self.max_wait = max_wait_ms / 1000
+        self._pending = {}
+
+    def submit(self, file_path: str, doc) -> None:
+        """登记待保存的文档"""
+        with _DOC_LOCK:
+            pending = self._pending.get(file_path)
+            # 定时器已结束(上次写盘失败)时需要重新计时
+            if pending is not None and not pending[1].finished.is_set():
+                self._pending[file_path] = (doc, pending[1])
+                return
+            timer = threading.Timer(self.max_wait, self._flush_later, (file_path,))
+            timer.daemon = True
+            self._pending[file_path] = (doc, timer)
+            timer.start()
+
+    def get(self, file_path: str):
+        """返回尚未写回磁盘的文档, 没有则返回 None"""
+        with _DOC_LOCK:
+            pending = self._pending.get(file_path)
+            return pending[0] if pending else None
+
+    def discard(self, file_path: str) -> None:
+        """取消待保存的修改"""
+        with _DOC_LOCK:
+            pending = self._pending.pop(file_path, None)
+            if pending:
+                pending[1].cancel()
+
+    def flush(self, file_path: str = None) -> None:
+        """
+        立即写回指定文档, 未指定时写回全部文档;
+        写回失败的文档仍保留在待保存列表中, 全部尝试完后抛出第一个错误
+        """
+        error = None
+        with _DOC_LOCK:
+            paths = [file_path] if file_path else list(self._pending)
+            for path in paths:
+                pending = self._pending.get(path)
+                if pending is None:
+                    continue
+                pending[1].cancel()
+                try:
+                    _save_doc(pending[0], path)
+                except Exception as e:
+                    logger.exception(f"写回文档 {path} 失败, 修改仍保留在内存中")
+                    if error is None:
+                        error = e
+        if error is not None:
+            raise error
+
+    def _flush_later(self, file_path: str) -> None:
+        """定时器到期时写回文档; 失败已记录日志, 留待下次修改或显式 flush 时重试"""
+        try:
+            self.flush(file_path)
+        except Exception:
+            pass
+
+
+_BATCHER = DocBatcher()
+atexit.register(_BATCHER.flush)
+
+
+def _read_bytes(file_path: str) -> bytes:
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+def _read_text(file_path: str) -> str:
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 
-# 导入中文字体, 解决中文乱码问题
-pdfmetrics.registerFont(TTFont('SimHei', 'simhei.ttf'))  # 黑体
-addMapping('SimHei', 0, 0, 'SimHei')
+def _write_text(file_path: str, content: str) -> None:
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+# 页数达到该值时才按页段分给多个进程提取, 小文件直接在当前进程中提取
+_PDF_PARALLEL_MIN_PAGES = 200
+def _env_workers(default: int = 4) -> int:
+    """
+    读取环境变量 WORD_MCP_WORKERS, 值不是整数时记录警告并使用默认值, 不影响服务启动
+    """
+    value = os.environ.get('WORD_MCP_WORKERS')
+    if not value:
+        return default
+    try:
+        return max(1, int(value))
+    except ValueError:
+        logger.warning(f"环境变量 WORD_MCP_WORKERS 的值 {value!r} 不是整数, 使用默认值 {default}")
+        return default
+
+
+# 并行提取的最大进程数, 可通过环境变量 WORD_MCP_WORKERS 调整
+_PDF_MAX_WORKERS = _env_workers()
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """
+    提取 PDF 中 [start, stop) 页的文本, 每个进程单独打开文档
+    """
+    with pymupdf.open(file_path) as pdf:
+        return [pdf[i].get_text() for i in range(start, stop)]
+
+
+def _iter_pdf_pages(file_path: str) -> Iterator[str]:
+    """
+    使用 PyMuPDF 按页码顺序逐页产出 PDF 文本, 页数较多时按页段并行提取
+    """
+    with pymupdf.open(file_path) as pdf:
+        page_count = pdf.page_count
+        workers = min(_PDF_MAX_WORKERS, os.cpu_count() or 1, page_count // _PDF_PARALLEL_MIN_PAGES)
+
+        # 已经在批量转换的子进程中时不再嵌套进程池
+        if workers <= 1 or multiprocessing.parent_process() is not None:
+            for page in pdf:
+                yield page.get_text()
+            return
+
+    # PyMuPDF 的文档对象不能跨线程使用, 因此用进程而不是线程
+    step = -(-page_count // workers)
+    starts = range(0, page_count, step)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = executor.map(_extract_pdf_pages, [file_path] * len(starts), starts,
+                              [min(start + step, page_count) for start in starts])
+        for chunk in chunks:
+            yield from chunk
+
+
+# 折行时的最小单位: 连续空白、单个 CJK 字符(可在任意字符间断行)、其他连续非空白字符(单词)
+_CJK_CHARS = '\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\ufe30-\ufe4f\uff00-\uffef'
+_PDF_TOKEN_RE = re.compile(rf'\s+|[{_CJK_CHARS}]|[^\s{_CJK_CHARS}]+')
+
+
+def _wrap_pdf_text(text: str, font, max_width: float, widths: dict) -> List[str]:
+    """
+    按可用宽度折行, 保留文本中原有的换行: 英文等在空白处断行, CJK 字符之间可随处断行,
+    单个单词比整行还宽时才按字符拆开
+    :param widths: 片段宽度的缓存, 同一次导出中重复出现的单词和汉字只测量一次
+    """
+    def measure(token):
+        width = widths.get(token)
+        if width is None:
+            width = widths[token] = font.text_length(token, _PDF_FONT_SIZE)
+        return width
+
+    lines = []
+    for raw_line in text.split("\n"):
+        line = []
+        width = 0.0
+        for token in _PDF_TOKEN_RE.findall(raw_line):
+            token_width = measure(token)
+            if width + token_width <= max_width:
+                line.append(token)
+                width += token_width
+                continue
+            if token.isspace():
+                # 在空白处断行, 空白本身不带到下一行
+                lines.append(''.join(line).rstrip())
+                line, width = [], 0.0
+                continue
+            if line:
+                lines.append(''.join(line).rstrip())
+                line, width = [], 0.0
+            if token_width <= max_width:
+                line.append(token)
+                width = token_width
+                continue
+            # 超长单词按字符拆开
+            for char in token:
+                char_width = measure(char)
+                if line and width + char_width > max_width:
+                    lines.append(''.join(line))
+                    line, width = [], 0.0
+                line.append(char)
+                width += char_width
+        lines.append(''.join(line).rstrip())
+    return lines
+
+
+def _write_pdf(paragraphs: List[str], output_path: str) -> None:
+    """
+    使用 PyMuPDF 将段落逐行排入 A4 页面, 超出页面高度时自动分页; 每页的文本通过 TextWriter 一次写入
+    """
+    font = pymupdf.Font(_PDF_FONT)
+    pdf = pymupdf.open()
+    widths = {}
+
+    try:
+        page = pdf.new_page()
+        writer = pymupdf.TextWriter(page.rect)
+        max_width = page.rect.width - 2 * _PDF_MARGIN
+        bottom = page.rect.height - _PDF_MARGIN
+        y = _PDF_MARGIN
+        for text in paragraphs:
+            for line in _wrap_pdf_text(text, font, max_width, widths):
+                if y + _PDF_LEADING > bottom:
+                    writer.write_text(page)
+                    page = pdf.new_page()
+                    writer = pymupdf.TextWriter(page.rect)
+                    y = _PDF_MARGIN
+                y += _PDF_LEADING
+                if line:
+                    writer.append((_PDF_MARGIN, y), line, font=font, fontsize=_PDF_FONT_SIZE)
+            y += _PDF_PARAGRAPH_SPACING
+        writer.write_text(page)
+        # 只嵌入用到的字形, 避免每个 PDF 都带上完整的中文字库
+        pdf.subset_fonts()
+        pdf.save(output_path, garbage=3, deflate=True)
+    finally:
+        pdf.close()
+
+
+@lru_cache(maxsize=None)
+def _xpath(expr: str) -> etree.XPath:
+    """
+    编译并缓存带 Word 命名空间的 XPath 表达式
+    """
+    return etree.XPath(expr, namespaces=nsmap)
+
+
+@lru_cache(maxsize=512)
+def _compiled(kind: str, pattern: str, flags: int = 0) -> re.Pattern:
+    """
+    编译并缓存查询用的正则表达式
+    :param kind: "regex" 原样编译; "keyword" 按完整词匹配字面文本; "contains" 匹配字面文本
+    """
+    if kind == 'regex':
+        return re.compile(pattern, flags)
+    escaped = re.escape(pattern)
+    return re.compile(rf'\b{escaped}\b' if kind == 'keyword' else escaped, flags)
+
+
+# 拼接多段文本时使用的分隔符, 字面查询文本中不会出现
+_TEXT_SEP = '\x1f'
+
+
+def _findall_each(pattern: re.Pattern, texts: List[str], joined: bool = True) -> Iterator[tuple]:
+    """
+    对每段文本做 findall, 依次产出有匹配的 (文本序号, 匹配列表)
+    :param joined: 为 True 时把所有文本用分隔符拼接后只调用一次 finditer, 再按偏移量映射回各段;
+        仅适用于不会匹配到分隔符的字面查询, 用户正则须逐段匹配
+    """
+    if not joined:
+        for idx, text in enumerate(texts):
+            if matches := pattern.findall(text):
+                yield idx, matches
+        return
+    if not texts:
+        # 空列表拼接后为空串, 空查询仍会在位置 0 匹配一次, 不能映射回任何文本
+        return
+
+    # offsets[i] 为第 i 段之后分隔符的下一个位置
+    offsets = list(accumulate(len(text) + 1 for text in texts))
+    current, matches = None, []
+    for m in pattern.finditer(_TEXT_SEP.join(texts)):
+        idx = bisect.bisect_right(offsets, m.start())
+        if idx != current:
+            if matches:
+                yield current, matches
+            current, matches = idx, []
+        matches.append(m.group())
+    if matches:
+        yield current, matches
+
+
+def _count(element, expr: str) -> int:
+    """
+    在 libxml2 中直接统计 XPath 匹配的元素个数, 不创建 python-docx 包装对象
+    """
+    return int(_xpath(f"count({expr})")(element))
+
+
+# jieba 导入和加载词典都较慢且只有中文分析用到, 首次使用时才加载
+_jieba = None
+_JIEBA_LOCK = threading.Lock()
+
+
+def _get_jieba():
+    """
+    返回已加载词典的 jieba 模块; 服务启动时会在后台线程中提前调用, 避免第一次中文分词请求卡顿数秒
+    """
+    global _jieba
+    if _jieba is None:
+        with _JIEBA_LOCK:
+            if _jieba is None:
+                import jieba
+                jieba.initialize()
+                _jieba = jieba
+    return _jieba
+
+
+@lru_cache(maxsize=4096)
+def _cut(text: str) -> tuple:
+    """
+    jieba 分词 (启用 HMM 识别新词), 相同文本直接复用上次的分词结果; 用于句子等短文本, 整篇文本请直接调用 jieba
+    """
+    return tuple(_get_jieba().cut(text, HMM=True))
+
+
+# 句子切分与分词用的正则, 导入时编译一次
+_SENT_ZH = re.compile(r'[。！？]')
+_SENT_EN = re.compile(r'[.!?]')
+_WORD_EN = re.compile(r'\b\w+\b')
+_CJK_ONLY = re.compile(r'^[\u4e00-\u9fa5]+$')
+
+
+# 单元格中各段落(含超链接内的 run)的文本节点, 与 python-docx 的 cell.text 取值范围一致
+_RUN_TEXT_CHILD = "*[self::w:t or self::w:tab or self::w:br or self::w:cr or self::w:noBreakHyphen or self::w:ptab]"
+_CELL_TEXT_NODES = f"w:p | w:p/w:r/{_RUN_TEXT_CHILD} | w:p/w:hyperlink/w:r/{_RUN_TEXT_CHILD}"
+_W_P = qn('w:p')
+
+
+def _cell_text(cell) -> str:
+    """
+    用一次 XPath 取出单元格文本, 结果与 cell.text 相同, 但不创建段落和 run 包装对象
+    """
+    parts = []
+    first = True
+    for node in _xpath(_CELL_TEXT_NODES)(cell._tc):
+        if node.tag == _W_P:
+            # 段落之间以换行分隔
+            if not first:
+                parts.append('\n')
+            first = False
+        else:
+            parts.append(str(node))
+    return ''.join(parts)
+
+
+def _paragraph_at(doc, index: int) -> Paragraph:
+    """
+    取文档主体中的第 index 个段落, 与 doc.paragraphs[index] 相同, 但只创建这一个段落对象
+    """
+    body = doc.element.body
+    if index < 0:
+        index += _count(body, "w:p")
+    found = _xpath("w:p[$n]")(body, n=index + 1) if index >= 0 else []
+    if not found:
+        raise IndexError("list index out of range")
+    return Paragraph(found[0], doc._body)
+
+
+_HEX6 = re.compile(r'^[0-9A-F]{6}$')
+
+
+def _parse_hex_color(color: str) -> RGBColor:
+    """
+    解析十六进制颜色 (如 "#FF0000" 或缩写 "#F00"), 格式错误时抛出 ValueError
+    """
+    # 移除#号并统一处理缩写格式（如 #FFF -> FFFFFF）
+    color = color.lstrip('#').upper()
+    if len(color) == 3:
+        color = ''.join(c * 2 for c in color)
+
+    # 验证是否为有效的6位十六进制
+    if not _HEX6.match(color):
+        raise ValueError("颜色格式错误")
+    return RGBColor.from_string(color)
+
+
+# 对齐方式参数映射
+_ALIGN = {
+    "left": WD_ALIGN_PARAGRAPH.LEFT,
+    "center": WD_ALIGN_PARAGRAPH.CENTER,
+    "right": WD_ALIGN_PARAGRAPH.RIGHT,
+    "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
+}
+
+# 行间距规则映射
+_SPACING_RULE = {
+    "multiple": WD_LINE_SPACING.MULTIPLE,
+    "exact": WD_LINE_SPACING.EXACTLY,
+    "atLeast": WD_LINE_SPACING.AT_LEAST
+}
+
+# 高亮颜色映射 (用于XML着色)
+_HIGHLIGHT_COLORS = {
+    "yellow": "FFFF00",
+    "green": "00FF00",
+    "blue": "0000FF",
+    "red": "FF0000",
+    "pink": "FFC0CB",
+    "turquoise": "40E0D0",
+    "violet": "EE82EE",
+    "darkblue": "00008B",
+    "teal": "008080",
+    "darkred": "8B0000",
+    "darkgreen": "006400"
+}
+
+
+def _make_shd(fill: str):
+    """
+    构建填充为指定颜色的 w:shd 底纹元素
+    """
+    shading_elm = OxmlElement('w:shd')
+    shading_elm.set(qn('w:fill'), fill)
+    return shading_elm
+
+
+# 每种高亮颜色的底纹模板, 使用时 copy.deepcopy, 不要直接挂到文档上
+_HIGHLIGHT_SHADING = {name: _make_shd(fill) for name, fill in _HIGHLIGHT_COLORS.items()}
+
+
+# 域代码 run 模板 (目录、页码等), 使用时复制并填入域指令
+_FIELD_RUN = parse_xml(
+    f'<w:r {nsdecls("w")}>'
+    '<w:fldChar w:fldCharType="begin"/>'
+    '<w:instrText xml:space="preserve"></w:instrText>'
+    '<w:fldChar w:fldCharType="end"/>'
+    '</w:r>'
+)
+
+
+def _field_run(instruction: str):
+    """
+    复制域代码 run 模板并设置域指令, 如 ' PAGE '
+    """
+    run = copy.deepcopy(_FIELD_RUN)
+    run[1].text = instruction
+    return run
 
 
 @mcp.tool()
@@ -37,9 +619,7 @@ def create_empty_txt(filename: str) -> str | dict[str, str]:
     if not filename.lower().endswith('.txt'):
         filename += '.txt'
 
-    output_path = os.environ.get('WORD_MCP_PATH')  # 从环境变量获取输出路径，如果未设置则使用默认桌面路径
-    if not output_path:
-        output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    output_path = _DEFAULT_BASE_PATH
 
     file_path = os.path.join(output_path, filename)
 
@@ -64,10 +644,7 @@ def create_word_document(filename: str) -> str | str | dict[str, str]:
     if not filename.lower().endswith('.docx'):
         filename += '.docx'
 
-    # 从环境变量获取输出路径，如果未设置则使用默认桌面路径
-    output_path = os.environ.get('WORD_MCP_PATH')  # 保持环境变量名不变，以兼容现有配置
-    if not output_path:
-        output_path = os.path.join(os.path.expanduser('~'), '桌面')
+    output_path = _DEFAULT_BASE_PATH
 
     file_path = os.path.join(output_path, filename)
 
@@ -79,7 +656,7 @@ def create_word_document(filename: str) -> str | str | dict[str, str]:
         doc = Document()
 
         # 保存文档
-        doc.save(file_path)
+        _write_doc(doc, file_path)
 
         return response_handler({"status": "success", "message": f"成功创建文件: {filename}"})
     except Exception as e:
@@ -87,27 +664,27 @@ def create_word_document(filename: str) -> str | str | dict[str, str]:
 
 
 @mcp.tool()
-def open_and_read_word_document(file_path: str) -> str:
+async def open_and_read_word_document(file_path: str) -> str:
     """
     打开并读取Word文档,返回文档信息头和内容
     """
     # 是否提供了完整路径
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"错误: 文件 {file_path} 不存在"})
 
     try:
-        doc = Document(file_path)
+        doc = await asyncio.to_thread(_load_doc, file_path)
 
-        # 提取文档基本信息
-        paragraphs = [p.text for p in doc.paragraphs]
-        headings = [p.text for p in doc.paragraphs if p.style.name.startswith('Heading')]
+        # 提取文档基本信息, 段落与标题在一次遍历中收集
+        paragraphs = []
+        headings = []
+        for p in doc.paragraphs:
+            p_text = p.text
+            paragraphs.append(p_text)
+            if p.style.name.startswith('Heading'):
+                headings.append(p_text)
 
         # 构建文档信息头
         doc_info = (
@@ -117,9 +694,7 @@ def open_and_read_word_document(file_path: str) -> str:
         )
 
         # 构建完整文档内容，保留段落结构，并在每段前添加段落编号
-        full_content = ""
-        for i, p_text in enumerate(paragraphs):
-            full_content += f"[{i}] {p_text}\n"
+        full_content = "".join(f"[{i}] {p_text}\n" for i, p_text in enumerate(paragraphs))
 
         return response_handler({"status": "success", "message": doc_info + full_content})
     except Exception as e:
@@ -139,21 +714,21 @@ def query_document_info(file_path: str) -> str:
     """
 
     # 路径处理
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH', os.path.expanduser('~/桌面'))
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": "文件不存在"})
 
     try:
         # 读取基础信息
-        doc = Document(file_path)
+        doc = _load_doc(file_path)
         core_props = doc.core_properties
+        # 与 doc.paragraphs / doc.tables / doc.inline_shapes 的统计口径一致
+        body = doc.element.body
         stats = {
-            'paragraphs': len(doc.paragraphs),
-            'tables': len(doc.tables),
-            'images': len(doc.inline_shapes)
+            'paragraphs': _count(body, "w:p"),
+            'tables': _count(body, "w:tbl"),
+            'images': _count(doc.element, "./w:body//w:p/w:r/w:drawing/wp:inline")
         }
 
         # 获取文件系统信息
@@ -205,12 +780,7 @@ def add_text_to_document(
     :
     """
 
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"错误: 文件 {file_path} 不存在"})
@@ -221,56 +791,48 @@ def add_text_to_document(
     if direction not in ["front", "behind"]:
         return response_handler({"status": "error", "message": f"错误: 无效的方向参数 '{direction}'，可选值为: front, behind"})
 
-    # 映射对齐方式参数
-    alignment_map = {
-        "left": WD_ALIGN_PARAGRAPH.LEFT,
-        "center": WD_ALIGN_PARAGRAPH.CENTER,
-        "right": WD_ALIGN_PARAGRAPH.RIGHT,
-        "justify": WD_ALIGN_PARAGRAPH.JUSTIFY
-    }
-
-    if alignment not in alignment_map:
+    if alignment not in _ALIGN:
         return response_handler(
             {"status": "error", "message": f"错误: 不支持的对齐方式 '{alignment}'，可选值为: left, center, right, justify"})
 
     try:
-        doc = Document(file_path)
-
-        # 检查段落索引是否有效（当不为默认值-1时）
-        if paragraph_index != -1 and (paragraph_index < 0 or paragraph_index >= len(doc.paragraphs)):
-            return response_handler(
-                {"status": "error", "message": f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"})
-
-        # 创建新段落或标题
-        if is_heading:
-            # 创建标题
-            new_paragraph = doc.add_heading(text, level=heading_level)
-            # 设置标题的对齐方式
-            new_paragraph.alignment = alignment_map[alignment]
-        else:
-            # 创建普通段落
-            new_paragraph = doc.add_paragraph(text)
-            new_paragraph.alignment = alignment_map[alignment]
-
-        # 如果指定了段落索引，根据direction参数调整新段落的位置
-        if paragraph_index != -1:
-            target_paragraph = doc.paragraphs[paragraph_index]
-
-            # 获取新段落的XML元素
-            new_p = new_paragraph._p
-
-            # 删除刚刚添加的段落，因为我们需要重新插入到指定位置
-            new_p.getparent().remove(new_p)
-
-            if direction == "front":
-                # 在目标段落前插入
-                target_paragraph._p.addprevious(new_p)
-            else:  # direction == "behind"
-                # 在目标段落后插入
-                target_paragraph._p.addnext(new_p)
-
-        # 保存文档
-        doc.save(file_path)
+        with _DOC_LOCK:
+            doc = _load_doc(file_path)
+            paragraph_count = _count(doc.element.body, "w:p")
+
+            # 检查段落索引是否有效（当不为默认值-1时）
+            if paragraph_index != -1 and (paragraph_index < 0 or paragraph_index >= paragraph_count):
+                return response_handler(
+                    {"status": "error", "message": f"错误: 无效的段落索引 {paragraph_index}，文档共有 {paragraph_count} 个段落"})
+
+            # 先在文档树之外构建完整的新段落, 最后一步才插入文档;
+            # 样式不存在或文本含非法字符等错误都发生在插入之前, 待保存的文档保持不变
+            new_p = OxmlElement('w:p')
+            new_paragraph = Paragraph(new_p, doc._body)
+            if text:
+                new_paragraph.add_run(text)
+            if is_heading:
+                # 与 doc.add_heading 使用相同的标题样式
+                new_paragraph.style = f"Heading {heading_level}"
+
+            # 设置段落的对齐方式
+            new_paragraph.alignment = _ALIGN[alignment]
+
+            if paragraph_index == -1:
+                # 在文档末尾(节属性之前)插入新段落或标题
+                doc.element.body._insert_p(new_p)
+            else:
+                # 直接在目标段落前/后插入新段落，避免先追加到文末再移动
+                target_paragraph = _paragraph_at(doc, paragraph_index)
+                if direction == "front":
+                    # 在目标段落前插入
+                    target_paragraph._p.addprevious(new_p)
+                else:  # direction == "behind"
+                    # 在目标段落后插入
+                    target_paragraph._p.addnext(new_p)
+
+            # 登记保存，短时间内的多次修改合并为一次写盘
+            _BATCHER.submit(file_path, doc)
 
         # 构建返回消息
         if paragraph_index == -1:
@@ -280,6 +842,7 @@ def add_text_to_document(
 
         return response_handler({"status": "success", "message": f"成功在{position_msg}添加了{'标题' if is_heading else '文本'}"})
     except Exception as e:
+        _evict_doc(file_path)
         return response_handler({"status": "error", "message": f"向Word文档添加内容时出错: {str(e)}"})
 
 
@@ -309,114 +872,108 @@ def format_text_in_document(
     :
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"错误: 文件 {file_path} 不存在"})
 
-    # 定义高亮颜色映射 (用于XML着色)
-    highlight_color_map = {
-        "yellow": "FFFF00",
-        "green": "00FF00",
-        "blue": "0000FF",
-        "red": "FF0000",
-        "pink": "FFC0CB",
-        "turquoise": "40E0D0",
-        "violet": "EE82EE",
-        "darkblue": "00008B",
-        "teal": "008080",
-        "darkred": "8B0000",
-        "darkgreen": "006400"
-    }
-
     # 校验高亮颜色
-    if highlight_color and highlight_color.lower() not in highlight_color_map:
+    if highlight_color and highlight_color.lower() not in _HIGHLIGHT_SHADING:
         return response_handler({"status": "error",
-                                 "message": f"错误: 不支持的高亮颜色 '{highlight_color}'，可选值为: {', '.join(highlight_color_map.keys())}"})
+                                 "message": f"错误: 不支持的高亮颜色 '{highlight_color}'，可选值为: {', '.join(_HIGHLIGHT_SHADING.keys())}"})
 
-    try:
-        # 打开Word文档
-        doc = Document(file_path)
-
-        # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return response_handler(
-                {"status": "error", "message": f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"})
-
-        # 获取指定的段落
-        paragraph = doc.paragraphs[paragraph_index]
+    # 校验字体颜色, 只与参数有关, 在遍历run之前解析一次
+    rgb_color = None
+    if font_color:
+        try:
+            rgb_color = _parse_hex_color(font_color)
+        except ValueError:
+            return response_handler({"status": "error",
+                                     "message": f"错误: 无效的字体颜色格式 '{font_color}'，请使用十六进制RGB格式，如 '#FF0000'"})
 
-        # 检查段落是否有内容
-        if not paragraph.text.strip():
-            return response_handler(
-                {"status": "warning", "message": f"警告: 段落 {paragraph_index + 1} 为空或只包含空白字符，无法设置格式"})
-
-        # 检查段落是否有run，如果没有，添加一个run
-        if len(paragraph.runs) == 0:
-            # 保存原始文本
-            original_text = paragraph.text
-            # 清空段落
-            for child in list(paragraph._element):
-                paragraph._element.remove(child)
-            # 添加新run
-            paragraph.add_run(original_text)
-
-        # 应用格式设置
-        for run in paragraph.runs:
-            if font_name:
-                # 设置西文字体名
-                run.font.name = font_name
-                # 设置中文字体名
-                run._element.get_or_add_rPr().get_or_add_rFonts().set(qn('w:eastAsia'), font_name)
-
-            if font_size:
-                run.font.size = Pt(font_size)
-
-            run.font.bold = bold
-            run.font.italic = italic
-            run.font.underline = underline
-
-            # 设置字体颜色
-            if font_color:
-                try:
-                    # 移除#号并统一处理缩写格式
-                    font_color = font_color.lstrip('#').upper()
-
-                    # 处理缩写格式（如 #FFF -> FFFFFF）
-                    if len(font_color) == 3:
-                        font_color = ''.join([c * 2 for c in font_color])
-
-                    # 验证是否为有效的6位十六进制
-                    if len(font_color) != 6:
-                        raise ValueError("颜色格式错误")
-
-                    r = int(font_color[0:2], 16)
-                    g = int(font_color[2:4], 16)
-                    b = int(font_color[4:6], 16)
-                    run.font.color.rgb = RGBColor(r, g, b)
-                except ValueError:
-                    return response_handler({"status": "error",
-                                             "message": f"错误: 无效的字体颜色格式 '{font_color}'，请使用十六进制RGB格式，如 '#FF0000'"})
-
-            # 设置高亮颜色（通过XML方式）
-            if highlight_color:
-                shading_elm = OxmlElement('w:shd')
-                color_value = highlight_color_map[highlight_color.lower()]
-                shading_elm.set(qn('w:fill'), color_value)
-                run._element.get_or_add_rPr().append(shading_elm)
+    # 高亮底纹元素使用预先构建的模板, 每个run复制一份
+    shading_template = _HIGHLIGHT_SHADING[highlight_color.lower()] if highlight_color else None
 
-        # 保存文档
-        doc.save(file_path)
+    try:
+        with _DOC_LOCK:
+            # 打开Word文档
+            doc = _load_doc(file_path)
+            paragraph_count = _count(doc.element.body, "w:p")
+
+            # 检查段落索引是否有效
+            if paragraph_index < 0 or paragraph_index >= paragraph_count:
+                return response_handler(
+                    {"status": "error", "message": f"错误: 无效的段落索引 {paragraph_index}，文档共有 {paragraph_count} 个段落"})
+
+            # 获取指定的段落
+            paragraph = _paragraph_at(doc, paragraph_index)
+
+            # 检查段落是否有内容
+            if not paragraph.text.strip():
+                return response_handler(
+                    {"status": "warning", "message": f"警告: 段落 {paragraph_index + 1} 为空或只包含空白字符，无法设置格式"})
+
+            # 在段落副本上设置格式, 全部成功后再替换原段落, 中途出错时文档保持不变
+            original_p = paragraph._p
+            paragraph = Paragraph(copy.deepcopy(original_p), paragraph._parent)
+
+            # 检查段落是否有run，如果没有，添加一个run
+            runs = paragraph.runs
+            if not runs:
+                # 保存原始文本
+                original_text = paragraph.text
+                # 清空段落
+                for child in list(paragraph._element):
+                    paragraph._element.remove(child)
+                # 添加新run
+                runs = [paragraph.add_run(original_text)]
+
+            # 原始格式相同的run设置后的结果也相同: 只对第一个run逐项设置, 其余直接复制设置好的rPr
+            formatted_rpr = {}
+
+            # 应用格式设置
+            for run in runs:
+                r = run._element
+                original_rpr = r.rPr
+                rpr_key = etree.tostring(original_rpr) if original_rpr is not None else b""
+                if rpr_key in formatted_rpr:
+                    if original_rpr is not None:
+                        r.remove(original_rpr)
+                    r.insert(0, copy.deepcopy(formatted_rpr[rpr_key]))
+                    continue
+
+                if font_name:
+                    # 设置西文字体名
+                    run.font.name = font_name
+                    # 设置中文字体名
+                    r.get_or_add_rPr().get_or_add_rFonts().set(qn('w:eastAsia'), font_name)
+
+                if font_size:
+                    run.font.size = Pt(font_size)
+
+                run.font.bold = bold
+                run.font.italic = italic
+                run.font.underline = underline
+
+                # 设置字体颜色
+                if rgb_color is not None:
+                    run.font.color.rgb = rgb_color
+
+                # 设置高亮颜色（通过XML方式）
+                if shading_template is not None:
+                    r.get_or_add_rPr().append(copy.deepcopy(shading_template))
+
+                formatted_rpr[rpr_key] = r.rPr
+
+            original_p.getparent().replace(original_p, paragraph._p)
+
+            # 登记保存，短时间内的多次修改合并为一次写盘
+            _BATCHER.submit(file_path, doc)
 
         return response_handler(
             {"status": "success", "message": f"成功设置文档 {os.path.basename(file_path)} 第 {paragraph_index + 1} 段落的格式"})
     except Exception as e:
+        _evict_doc(file_path)
         return response_handler({"status": "error", "message": f"设置Word文档格式时出错: {str(e)}"})
 
 
@@ -440,70 +997,63 @@ def set_paragraph_spacing(
     :
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"错误: 文件 {file_path} 不存在"})
 
-    # 映射行间距规则
-    spacing_rule_map = {
-        "multiple": WD_LINE_SPACING.MULTIPLE,
-        "exact": WD_LINE_SPACING.EXACTLY,
-        "atLeast": WD_LINE_SPACING.AT_LEAST
-    }
-
-    if line_spacing_rule not in spacing_rule_map:
+    if line_spacing_rule not in _SPACING_RULE:
         return response_handler(
             {"status": "error", "message": f"错误: 无效的行间距规则 '{line_spacing_rule}'，可选值为: multiple, exact, atLeast"})
 
     try:
-        # 打开Word文档
-        doc = Document(file_path)
-
-        # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
-            return response_handler(
-                {"status": "error", "message": f"错误: 无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落"})
-
-        # 获取指定的段落
-        paragraph = doc.paragraphs[paragraph_index]
-
-        # 设置段前间距
-        if before_spacing is not None:
-            paragraph.paragraph_format.space_before = Pt(before_spacing)
-
-        # 设置段后间距
-        if after_spacing is not None:
-            paragraph.paragraph_format.space_after = Pt(after_spacing)
+        with _DOC_LOCK:
+            # 打开Word文档
+            doc = _load_doc(file_path)
+            paragraph_count = _count(doc.element.body, "w:p")
+
+            # 检查段落索引是否有效
+            if paragraph_index < 0 or paragraph_index >= paragraph_count:
+                return response_handler(
+                    {"status": "error", "message": f"错误: 无效的段落索引 {paragraph_index}，文档共有 {paragraph_count} 个段落"})
+
+            # 获取指定的段落, 在副本上修改, 全部成功后再替换原段落
+            original_p = _paragraph_at(doc, paragraph_index)._p
+            paragraph = Paragraph(copy.deepcopy(original_p), doc._body)
+
+            # 设置段前间距
+            if before_spacing is not None:
+                paragraph.paragraph_format.space_before = Pt(before_spacing)
+
+            # 设置段后间距
+            if after_spacing is not None:
+                paragraph.paragraph_format.space_after = Pt(after_spacing)
+
+            # 设置行间距
+            if line_spacing is not None:
+                # 设置行间距规则
+                paragraph.paragraph_format.line_spacing_rule = _SPACING_RULE[line_spacing_rule]
+
+                # 根据规则设置行间距值
+                if line_spacing_rule == "multiple":
+                    paragraph.paragraph_format.line_spacing = line_spacing
+                else:
+                    paragraph.paragraph_format.line_spacing = Pt(line_spacing)
 
-        # 设置行间距
-        if line_spacing is not None:
-            # 设置行间距规则
-            paragraph.paragraph_format.line_spacing_rule = spacing_rule_map[line_spacing_rule]
+            original_p.getparent().replace(original_p, paragraph._p)
 
-            # 根据规则设置行间距值
-            if line_spacing_rule == "multiple":
-                paragraph.paragraph_format.line_spacing = line_spacing
-            else:
-                paragraph.paragraph_format.line_spacing = Pt(line_spacing)
-
-        # 保存文档
-        doc.save(file_path)
+            # 登记保存，短时间内的多次修改合并为一次写盘
+            _BATCHER.submit(file_path, doc)
 
         return response_handler(
             {"status": "success", "message": f"成功设置文档 {os.path.basename(file_path)} 第 {paragraph_index + 1} 段落的间距"})
     except Exception as e:
+        _evict_doc(file_path)
         return response_handler({"status": "error", "message": f"设置段落间距时出错: {str(e)}"})
 
 
 @mcp.tool()
-def insert_image(
+async def insert_image(
         file_path: str,
         image_path: str,
         width: float = None,
@@ -520,67 +1070,52 @@ def insert_image(
     :
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"错误: 文件 {file_path} 不存在"})
 
     # 处理图片路径，同样支持相对路径
-    if not os.path.isabs(image_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        image_path = os.path.join(base_path, image_path)
+    image_path = _resolve(image_path)
 
     # 检查图片文件是否存在
     if not os.path.exists(image_path):
         return response_handler({"status": "error", "message": f"错误: 图片文件 {image_path} 不存在"})
 
     try:
-        # 打开Word文档
-        doc = Document(file_path)
-
-        # 检查指定段落是否有效
-        if after_paragraph >= len(doc.paragraphs):
-            return response_handler(
-                {"status": "error", "message": f"错误: 无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落"})
+        # 在线程中读取图片，避免阻塞事件循环
+        image_stream = io.BytesIO(await asyncio.to_thread(_read_bytes, image_path))
+
+        with _DOC_LOCK:
+            # 打开Word文档
+            doc = _load_doc(file_path)
+            paragraph_count = _count(doc.element.body, "w:p")
+
+            # 检查指定段落是否有效
+            if after_paragraph >= paragraph_count:
+                return response_handler(
+                    {"status": "error", "message": f"错误: 无效的段落索引 {after_paragraph}，文档共有 {paragraph_count} 个段落"})
+
+            # 先解析图片并按尺寸生成图片元素(与 run.add_picture 相同), 图片无法识别时文档还未修改
+            inline = doc.part.new_pic_inline(image_stream, width=Cm(width) if width else None,
+                                             height=Cm(height) if height else None)
+
+            # 在指定位置插入图片
+            if after_paragraph == -1:
+                # 在文档末尾插入图片
+                paragraph = doc.add_paragraph()
+            else:
+                # 在指定段落后插入新段落，然后插入图片
+                paragraph = _paragraph_at(doc, after_paragraph)
+            paragraph.add_run()._r.add_drawing(inline)
 
-        # 在指定位置插入图片
-        if after_paragraph == -1:
-            # 在文档末尾插入图片
-            paragraph = doc.add_paragraph()
-        else:
-            # 在指定段落后插入新段落，然后插入图片
-            paragraph = doc.paragraphs[after_paragraph]
-
-        # 设置图片尺寸
-        if width and height:
-            run = paragraph.add_run()
-            run.add_picture(image_path, width=Cm(width), height=Cm(height))
-        elif width:
-            run = paragraph.add_run()
-            run.add_picture(image_path, width=Cm(width))
-        elif height:
-            run = paragraph.add_run()
-            run.add_picture(image_path, height=Cm(height))
-        else:
-            run = paragraph.add_run()
-            run.add_picture(image_path)
-
-        # 保存文档
-        doc.save(file_path)
+            # 登记保存，短时间内的多次修改合并为一次写盘
+            _BATCHER.submit(file_path, doc)
 
         return response_handler({"status": "success",
                                  "message": f"成功在文档 {os.path.basename(file_path)} 中插入图片 {os.path.basename(image_path)}"})
     except Exception as e:
+        _evict_doc(file_path)
         return response_handler({"status": "error", "message": f"插入图片时出错: {str(e)}"})
 
 
@@ -602,13 +1137,7 @@ def insert_table(
     :param after_paragraph: 在指定段落后插入表格，-1表示文档末尾
     :param style: 表格样式，默认为"Table Grid"
     """
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
@@ -617,40 +1146,41 @@ def insert_table(
         return response_handler({"status": "error", "message": "表格行数和列数必须大于0", "data": None})
 
     try:
-        # 打开Word文档
-        doc = Document(file_path)
-
-        # 检查指定段落是否有效
-        if after_paragraph >= len(doc.paragraphs):
-            return response_handler(
-                {"status": "error", "message": f"无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落",
-                 "data": None})
-
-        # 在指定位置插入表格
-        if after_paragraph == -1:
-            # 在文档末尾插入表格
-            table = doc.add_table(rows=rows, cols=cols)
-        else:
-            # 获取指定段落的位置
-            paragraph = doc.paragraphs[after_paragraph]
-            # 在段落后插入表格
-            table = doc.add_table(rows=rows, cols=cols)
-            # 移动表格到指定段落后
-            paragraph._p.addnext(table._tbl)
-
-        # 设置表格样式
-        table.style = style
-
-        # 如果提供了数据，填充表格内容
-        if data:
-            for i, row_data in enumerate(data):
-                if i < rows:  # 确保不超出表格行数
-                    for j, cell_data in enumerate(row_data):
-                        if j < cols:  # 确保不超出表格列数
-                            table.cell(i, j).text = str(cell_data)
+        with _DOC_LOCK:
+            # 打开Word文档
+            doc = _load_doc(file_path)
+            paragraph_count = _count(doc.element.body, "w:p")
+
+            # 检查指定段落是否有效
+            if after_paragraph >= paragraph_count:
+                return response_handler(
+                    {"status": "error", "message": f"无效的段落索引 {after_paragraph}，文档共有 {paragraph_count} 个段落",
+                     "data": None})
+
+            # 与 doc.add_table 相同地创建表格, 但先不放入文档: 样式不存在等错误发生时正文保持不变
+            table = Table(CT_Tbl.new_tbl(rows, cols, doc._block_width), doc._body)
+
+            # 设置表格样式
+            table.style = style
+
+            # 如果提供了数据，填充表格内容
+            if data:
+                for i, row_data in enumerate(data):
+                    if i < rows:  # 确保不超出表格行数
+                        for j, cell_data in enumerate(row_data):
+                            if j < cols:  # 确保不超出表格列数
+                                table.cell(i, j).text = str(cell_data)
+
+            # 在指定位置插入表格
+            if after_paragraph == -1:
+                # 在文档末尾插入表格
+                doc.element.body._insert_tbl(table._tbl)
+            else:
+                # 在指定段落后插入表格
+                _paragraph_at(doc, after_paragraph)._p.addnext(table._tbl)
 
-        # 保存文档
-        doc.save(file_path)
+            # 登记保存，短时间内的多次修改合并为一次写盘
+            _BATCHER.submit(file_path, doc)
 
         return response_handler({
             "status": "success",
@@ -663,6 +1193,7 @@ def insert_table(
             }
         })
     except Exception as e:
+        _evict_doc(file_path)
         return response_handler({"status": "error", "message": f"插入表格时出错: {str(e)}", "data": None})
 
 
@@ -683,43 +1214,43 @@ def edit_table_cell(
     :param text: 单元格内容
     """
 
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
 
     try:
-        # 打开Word文档
-        doc = Document(file_path)
-
-        # 检查表格索引是否有效
-        if table_index < 0 or table_index >= len(doc.tables):
-            return response_handler(
-                {"status": "error", "message": f"无效的表格索引 {table_index}，文档共有 {len(doc.tables)} 个表格", "data": None})
-
-        # 获取指定的表格
-        table = doc.tables[table_index]
-
-        # 检查行索引是否有效
-        if row < 0 or row >= len(table.rows):
-            return response_handler(
-                {"status": "error", "message": f"无效的行索引 {row}，表格共有 {len(table.rows)} 行", "data": None})
-
-        # 检查列索引是否有效
-        if col < 0 or col >= len(table.columns):
-            return response_handler(
-                {"status": "error", "message": f"无效的列索引 {col}，表格共有 {len(table.columns)} 列", "data": None})
-
-        # 编辑单元格内容
-        table.cell(row, col).text = text
-
-        # 保存文档
-        doc.save(file_path)
+        with _DOC_LOCK:
+            # 打开Word文档
+            doc = _load_doc(file_path)
+            tables = doc.tables
+
+            # 检查表格索引是否有效
+            if table_index < 0 or table_index >= len(tables):
+                return response_handler(
+                    {"status": "error", "message": f"无效的表格索引 {table_index}，文档共有 {len(tables)} 个表格", "data": None})
+
+            # 获取指定的表格
+            table = tables[table_index]
+
+            # 检查行索引是否有效
+            if row < 0 or row >= len(table.rows):
+                return response_handler(
+                    {"status": "error", "message": f"无效的行索引 {row}，表格共有 {len(table.rows)} 行", "data": None})
+
+            # 检查列索引是否有效
+            if col < 0 or col >= len(table.columns):
+                return response_handler(
+                    {"status": "error", "message": f"无效的列索引 {col}，表格共有 {len(table.columns)} 列", "data": None})
+
+            # 在单元格副本上编辑内容, 成功后再替换原单元格
+            tc = table.cell(row, col)._tc
+            cell = _Cell(copy.deepcopy(tc), table)
+            cell.text = text
+            tc.getparent().replace(tc, cell._tc)
+
+            # 登记保存，短时间内的多次修改合并为一次写盘
+            _BATCHER.submit(file_path, doc)
 
         return response_handler({
             "status": "success",
@@ -733,11 +1264,107 @@ def edit_table_cell(
             }
         })
     except Exception as e:
+        _evict_doc(file_path)
         return response_handler({"status": "error", "message": f"编辑表格单元格时出错: {str(e)}", "data": None})
 
 
+def _export_docx(file_path: str, output_path: str) -> dict:
+    """
+    另存为 DOCX: 无需转换, 先写入待保存的修改, 再直接复制文件
+    """
+    _BATCHER.flush(file_path)
+    try:
+        shutil.copyfile(file_path, output_path)
+    except shutil.SameFileError:
+        # 输出路径就是原文件, 写入修改后即已是最新内容
+        pass
+    return {
+        "status": "success",
+        "message": f"成功将文档保存为 DOCX 格式: {os.path.basename(output_path)}",
+        "data": {
+            "original_file": file_path,
+            "new_file": output_path,
+            "format": "docx"
+        }
+    }
+
+
+def _export_pdf(file_path: str, output_path: str) -> dict:
+    """
+    使用 PyMuPDF 生成 PDF
+    """
+    doc = _load_doc(file_path)
+    with _DOC_LOCK:
+        paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
+
+    _write_pdf(paragraphs, output_path)
+    return {
+        "status": "success",
+        "message": f"成功将文档导出为PDF: {os.path.basename(output_path)}",
+        "data": {
+            "original_file": file_path,
+            "pdf_file": output_path
+        }
+    }
+
+
+def _export_txt(file_path: str, output_path: str) -> dict:
+    """
+    将文档转换为纯文本
+    """
+    doc = _load_doc(file_path)
+    # 逐段写入带缓冲的文件, 不在内存中拼出整篇文本
+    with _DOC_LOCK, open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        separator = ""
+        for para in doc.paragraphs:
+            text = para.text
+            if text.strip():
+                f.write(separator)
+                f.write(text)
+                separator = "\n\n"
+    return {
+        "status": "success",
+        "message": f"成功将文档保存为文本格式: {os.path.basename(output_path)}",
+        "data": {
+            "original_file": file_path,
+            "new_file": output_path,
+            "format": "txt"
+        }
+    }
+
+
+def _export_html(file_path: str, output_path: str) -> dict:
+    """
+    将文档转换为 HTML
+    """
+    doc = _load_doc(file_path)
+    with _DOC_LOCK:
+        body = "".join(f"<p>{html.escape(para.text)}</p>\n" for para in doc.paragraphs if para.text.strip())
+    html_content = f"<html><body>\n{body}</body></html>"
+
+    _write_text(output_path, html_content)
+    return {
+        "status": "success",
+        "message": f"成功将文档保存为HTML格式: {os.path.basename(output_path)}",
+        "data": {
+            "original_file": file_path,
+            "new_file": output_path,
+            "format": "html"
+        }
+    }
+
+
+# 输出格式 -> 导出函数, 每个函数按需加载文档并返回结果字典
+_EXPORTERS = {
+    "docx": _export_docx,
+    "pdf": _export_pdf,
+    "txt": _export_txt,
+    "html": _export_html
+}
+
+
 @mcp.tool()
-def save_document_as(file_path: str, output_format: str = "docx", new_filename: str = None) -> str:
+async def save_document_as(file_path: str, output_format: str = "docx", new_filename: str = None) -> str:
     """
     将Word文档保存为指定格式
     :param file_path: Word文档的完整路径或相对于输出目录的路径
@@ -746,18 +1373,13 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
     """
 
     # 检查格式是否支持
-    supported_formats = ["docx", "pdf", "txt", "html"]
-    if output_format.lower() not in supported_formats:
+    exporter = _EXPORTERS.get(output_format.lower())
+    if exporter is None:
         return response_handler(
-            {"status": "error", "message": f"不支持的输出格式 '{output_format}'，可选值为: {', '.join(supported_formats)}",
+            {"status": "error", "message": f"不支持的输出格式 '{output_format}'，可选值为: {', '.join(_EXPORTERS)}",
              "data": None})
 
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
@@ -776,111 +1398,122 @@ def save_document_as(file_path: str, output_format: str = "docx", new_filename:
         # 创建新文件的完整路径
         output_path = os.path.join(output_dirname, f"{output_basename}.{output_format}")
 
-        # 根据输出格式选择不同的处理方式
-        if output_format.lower() == "pdf":
-            # 使用 reportlab 生成 PDF
-            doc = Document(file_path)
-            text_content = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+        return response_handler(await asyncio.to_thread(exporter, file_path, output_path))
 
-            # 创建 PDF
-            pdf = SimpleDocTemplate(output_path)
-            styles = getSampleStyleSheet()
-            styles['Normal'].fontName = 'SimHei'  # 设置中文字体, 防止乱码
-            elements = []
-
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    elements.append(Paragraph(para.text, styles['Normal']))
-                    elements.append(Spacer(1, 0.2 * inch))
-
-            pdf.build(elements)
+    except Exception as e:
+        return response_handler({"status": "error", "message": f"保存文档时出错: {str(e)}", "data": None})
 
-            return response_handler({
-                "status": "success",
-                "message": f"成功将文档导出为PDF: {os.path.basename(output_path)}",
-                "data": {
-                    "original_file": file_path,
-                    "pdf_file": output_path
-                }
-            })
 
-        elif output_format.lower() == "docx":
-            # 使用 python-docx 保存为 DOCX
-            doc = Document(file_path)
-            doc.save(output_path)
+# 去除注释、script/style 及其内容和其余标签, 仅在 lxml 无法解析时使用
+_HTML_TAG_RE = re.compile(r'(?:<!--[\s\S]*?-->)|(?:<(script|style)\b[^>]*>[\s\S]*?</\1\s*>)|(?:<[^>]+>)', re.I)
+_BLANK_LINE_RE = re.compile(r'\n\s*\n')
 
-            return response_handler({
-                "status": "success",
-                "message": f"成功将文档保存为 DOCX 格式: {os.path.basename(output_path)}",
-                "data": {
-                    "original_file": file_path,
-                    "new_file": output_path,
-                    "format": "docx"
-                }
-            })
 
-        elif output_format.lower() == "txt":
-            # 将文档转换为纯文本
-            doc = Document(file_path)
-            text_content = "\n\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+# 批量生成段落时每次解析的段落数
+_BULK_PARAGRAPHS = 1000
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
 
-            return response_handler({
-                "status": "success",
-                "message": f"成功将文档保存为文本格式: {os.path.basename(output_path)}",
-                "data": {
-                    "original_file": file_path,
-                    "new_file": output_path,
-                    "format": "txt"
-                }
-            })
+def _paragraph_xml(text: str) -> str:
+    """
+    生成只含一个run的 w:p 片段, 与 add_paragraph 一样将换行转为 w:br, 制表符转为 w:tab
+    """
+    parts = []
+    for i, line in enumerate(text.split("\n")):
+        if i:
+            parts.append("<w:br/>")
+        for j, piece in enumerate(line.split("\t")):
+            if j:
+                parts.append("<w:tab/>")
+            if piece:
+                space = ' xml:space="preserve"' if piece != piece.strip() else ''
+                parts.append(f'<w:t{space}>{html.escape(piece, quote=False)}</w:t>')
+    return f'<w:p><w:r>{"".join(parts)}</w:r></w:p>'
+
+
+def _append_paragraphs(doc, texts) -> None:
+    """
+    将多段文本追加到文档末尾: 拼接成 XML 后一次解析, 代替逐段调用 add_paragraph
+    """
+    body = doc.element.body
+    sect_pr = body.sectPr
+    batch = []
+
+    def flush():
+        fragment = parse_xml(f'<w:body {nsdecls("w")}>{"".join(batch)}</w:body>')
+        for p in list(fragment):
+            # 与 add_paragraph 相同, 段落位于节属性 sectPr 之前
+            if sect_pr is not None:
+                sect_pr.addprevious(p)
+            else:
+                body.append(p)
+        batch.clear()
 
-        elif output_format.lower() == "html":
-            # 将文档转换为 HTML
-            doc = Document(file_path)
-            html_content = "<html><body>\n"
-            for para in doc.paragraphs:
-                if para.text.strip():
-                    html_content += f"<p>{para.text}</p>\n"
-            html_content += "</body></html>"
+    for text in texts:
+        batch.append(_paragraph_xml(text))
+        if len(batch) >= _BULK_PARAGRAPHS:
+            flush()
+    if batch:
+        flush()
 
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
 
-            return response_handler({
-                "status": "success",
-                "message": f"成功将文档保存为HTML格式: {os.path.basename(output_path)}",
-                "data": {
-                    "original_file": file_path,
-                    "new_file": output_path,
-                    "format": "html"
-                }
-            })
+def _iter_text_blocks(file_path: str, chunk_size: int = 1 << 16) -> Iterator[str]:
+    """
+    分块读取文本文件, 按空行切分并逐个产出去除首尾空白后的非空段落
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        # 尚未结束的段落: head 为已确认不含空行分隔的片段, tail 为末尾可能与下一块组成空行的空白
+        head = []
+        tail = ""
+        while chunk := f.read(chunk_size):
+            # 只需从 tail 开始重新匹配, 不必反复扫描整个未结束的段落
+            blocks = _BLANK_LINE_RE.split(tail + chunk)
+            # 最后一块可能在下一次读取时才结束
+            rest = blocks.pop()
+            if blocks:
+                head.append(blocks[0])
+                blocks[0] = ''.join(head)
+                head = []
+                for block in blocks:
+                    block = block.strip()
+                    if block:
+                        yield block
+            # 空行分隔只可能从末尾空白中的第一个换行开始
+            cut = rest.find('\n', len(rest.rstrip()))
+            if cut == -1:
+                cut = len(rest)
+            head.append(rest[:cut])
+            tail = rest[cut:]
+        last = (''.join(head) + tail).strip()
+        if last:
+            yield last
+
+
+def _html_to_text(html_content: str) -> str:
+    """
+    提取 HTML 中的可见文本, 忽略注释和 script/style 内容
+    """
+    try:
+        root = lxml.html.fromstring(html_content)
+    except (etree.ParserError, ValueError):
+        return html.unescape(_HTML_TAG_RE.sub('', html_content))
 
-    except Exception as e:
-        return response_handler({"status": "error", "message": f"保存文档时出错: {str(e)}", "data": None})
+    for element in root.xpath('//script|//style'):
+        element.drop_tree()
+    return root.text_content()
 
 
-@mcp.tool()
-def convert_to_docx(file_path: str, new_filename: str = None) -> str:
+def _convert_one(file_path: str, new_filename: str = None) -> dict:
     """
-    将支持的文件格式转换为DOCX格式
-    :param file_path: 原始文件的完整路径或相对于工作目录的路径
+    将单个文件转换为DOCX格式, 返回结果字典（可在子进程中执行）
+    :param file_path: 原始文件的完整路径
     :param new_filename: 新文件名(不含扩展名)，如果不提供则使用原文件名
     """
     # 支持的输入格式
     supported_formats = ["pdf", "txt", "html", "docx"]
 
     try:
-        # 处理文件路径
-        if not os.path.isabs(file_path):
-            base_path = os.environ.get('WORD_MCP_PATH', os.path.join(os.path.expanduser('~'), '桌面'))
-            file_path = os.path.join(base_path, file_path)
-
         if not os.path.exists(file_path):
-            return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
+            return {"status": "error", "message": f"文件 {file_path} 不存在", "data": None}
 
         # 获取文件信息
         file_ext = os.path.splitext(file_path)[1][1:].lower()
@@ -888,15 +1521,15 @@ def convert_to_docx(file_path: str, new_filename: str = None) -> str:
 
         # 检查格式支持
         if file_ext not in supported_formats:
-            return response_handler({
+            return {
                 "status": "error",
                 "message": f"不支持的文件格式 '{file_ext}'，支持格式: {', '.join(supported_formats)}",
                 "data": None
-            })
+            }
 
         # 如果是docx直接返回原文件
         if file_ext == "docx":
-            return response_handler({
+            return {
                 "status": "success",
                 "message": "文件已经是DOCX格式",
                 "data": {
@@ -904,7 +1537,7 @@ def convert_to_docx(file_path: str, new_filename: str = None) -> str:
                     "new_file": file_path,
                     "format": "docx"
                 }
-            })
+            }
 
         # 构建输出路径
         output_dir = os.path.dirname(file_path)
@@ -913,62 +1546,47 @@ def convert_to_docx(file_path: str, new_filename: str = None) -> str:
 
         if file_ext == "pdf":
             try:
-                # 使用 PyPDF2 提取 PDF 文本
-                reader = PdfReader(file_path)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-                print(f"提取的文本长度: {len(text)}")  # 调试信息
-
-                # 将文本写入到新的 docx 文档中
+                # 使用 PyMuPDF 逐页提取 PDF 文本, 直接写入到新的 docx 文档中
                 doc = Document()
-                paragraphs = text.split("\n")
-                for para in paragraphs:
-                    if para.strip():
-                        doc.add_paragraph(para.strip())
-                print(f"即将保存到: {output_path}")  # 调试信息
-                doc.save(output_path)
+                for page_text in _iter_pdf_pages(file_path):
+                    _append_paragraphs(doc, [line for line in map(str.strip, page_text.splitlines()) if line])
+                logger.debug(f"PDF 文本已转换, 保存到 {output_path}")
+                _write_doc(doc, output_path)
             except Exception as e:
-                return response_handler({
+                return {
                     "status": "error",
                     "message": f"PDF转DOCX失败: {str(e)}",
                     "data": None
-                })
+                }
 
         elif file_ext == "txt":
             try:
-                # 使用 python-docx 创建新文档
+                # 使用 python-docx 创建新文档, 按空行分割段落
                 doc = Document()
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        # 按换行符分割段落
-                        doc.add_paragraph(line.strip())
-                doc.save(output_path)
+                _append_paragraphs(doc, _iter_text_blocks(file_path))
+                _write_doc(doc, output_path)
             except Exception as e:
-                return response_handler({
+                return {
                     "status": "error",
                     "message": f"TXT转DOCX失败: {str(e)}",
                     "data": None
-                })
+                }
 
         elif file_ext == "html":
             try:
-                # 使用正则表达式提取 HTML 中的文本
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    html_content = f.read()
-                    text = re.sub(r'<[^>]+>', '', html_content)
-                # 将文本写入到新的 docx 文档中
+                # 提取 HTML 中的文本, 按空行拆分为段落写入到新的 docx 文档中
+                text = _html_to_text(_read_text(file_path))
                 doc = Document()
-                doc.add_paragraph(text)
-                doc.save(output_path)
+                _append_paragraphs(doc, [para for para in map(str.strip, _BLANK_LINE_RE.split(text)) if para])
+                _write_doc(doc, output_path)
             except Exception as e:
-                return response_handler({
+                return {
                     "status": "error",
                     "message": f"HTML转DOCX失败: {str(e)}",
                     "data": None
-                })
+                }
 
-        return response_handler({
+        return {
             "status": "success",
             "message": f"成功转换文件为DOCX格式: {os.path.basename(output_path)}",
             "data": {
@@ -976,14 +1594,87 @@ def convert_to_docx(file_path: str, new_filename: str = None) -> str:
                 "new_file": output_path,
                 "format": "docx"
             }
-        })
+        }
 
     except Exception as e:
-        return response_handler({
+        return {
             "status": "error",
             "message": f"文件转换失败: {str(e)}",
             "data": None
-        })
+        }
+
+
+def _convert_many(file_paths: List[str], workers: int) -> List[dict]:
+    """
+    使用进程池并行转换多个文件, 单个文件失败不影响其他文件
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(file_paths)))) as executor:
+        futures = {executor.submit(_convert_one, path): path for path in file_paths}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": "error", "message": f"文件转换失败: {str(e)}", "data": None}
+
+            results[path] = {
+                "file": path,
+                "status": result["status"],
+                "new_file": result["data"]["new_file"] if result["data"] else None,
+                "error": result["message"] if result["status"] == "error" else None
+            }
+            logger.info(f"[{done}/{len(file_paths)}] {os.path.basename(path)}: {result['status']}")
+
+    return [results[path] for path in file_paths]
+
+
+@mcp.tool()
+async def convert_to_docx(file_path: str, new_filename: str = None) -> str:
+    """
+    将支持的文件格式转换为DOCX格式
+    :param file_path: 原始文件的完整路径或相对于工作目录的路径
+    :param new_filename: 新文件名(不含扩展名)，如果不提供则使用原文件名
+    """
+    # 处理文件路径
+    file_path = _resolve(file_path)
+
+    return response_handler(await asyncio.to_thread(_convert_one, file_path, new_filename))
+
+
+@mcp.tool()
+async def convert_directory_to_docx(dir_path: str, workers: int = 4) -> str:
+    """
+    将目录下所有支持的文件(pdf, txt, html)并行转换为DOCX格式
+    :param dir_path: 目录的完整路径或相对于工作目录的路径
+    :param workers: 并行转换的进程数，默认为4
+    """
+    dir_path = _resolve(dir_path)
+
+    if not os.path.isdir(dir_path):
+        return response_handler({"status": "error", "message": f"目录 {dir_path} 不存在", "data": None})
+
+    file_paths = [
+        os.path.join(dir_path, name) for name in sorted(os.listdir(dir_path))
+        if os.path.splitext(name)[1][1:].lower() in ("pdf", "txt", "html")
+    ]
+    if not file_paths:
+        return response_handler({"status": "error", "message": f"目录 {dir_path} 中没有可转换的文件", "data": None})
+
+    try:
+        results = await asyncio.to_thread(_convert_many, file_paths, workers)
+    except Exception as e:
+        return response_handler({"status": "error", "message": f"批量转换失败: {str(e)}", "data": None})
+
+    success_count = sum(1 for r in results if r["status"] == "success")
+    return response_handler({
+        "status": "success",
+        "message": f"成功转换 {success_count}/{len(results)} 个文件为DOCX格式",
+        "data": {
+            "directory": dir_path,
+            "results": results
+        }
+    })
 
 
 @mcp.tool()
@@ -994,24 +1685,19 @@ def close_document(file_path: str, save_changes: bool = True) -> str:
     :param save_changes: 是否保存更改，默认为True
     """
 
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
 
     try:
-        # 使用 python-docx 读取文档
-        doc = Document(file_path)
-
-        # 如果需要保存更改，则保存文档
-        if save_changes:
-            doc.save(file_path)
+        # 写入尚未保存的修改; 其余修改在各工具调用时都已写盘, 无需重新解析并保存
+        _BATCHER.flush(file_path)
+        if not zipfile.is_zipfile(file_path):
+            return response_handler({"status": "error", "message": f"文件 {file_path} 不是有效的Word文档", "data": None})
 
-        # python-docx 没有明确的关闭方法，垃圾收集器会处理
+        # python-docx 没有打开的文件句柄需要关闭, 只释放缓存中的已解析文档
+        _evict_doc(file_path)
         return response_handler({
             "status": "success",
             "message": f"成功关闭文档: {os.path.basename(file_path)}" + (" 并保存更改" if save_changes else ""),
@@ -1040,53 +1726,42 @@ def edit_paragraph_in_document(
     :param save: 是否保存更改，默认为True
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
 
     try:
         # 打开Word文档
+        _BATCHER.flush(file_path)
         doc = Document(file_path)
+        paragraphs = doc.paragraphs
 
         # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
+        if paragraph_index < 0 or paragraph_index >= len(paragraphs):
             return response_handler(
-                {"status": "error", "message": f"无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落",
+                {"status": "error", "message": f"无效的段落索引 {paragraph_index}，文档共有 {len(paragraphs)} 个段落",
                  "data": None})
 
         # 获取并编辑指定的段落
-        paragraph = doc.paragraphs[paragraph_index]
-
-        # 保存原始样式和格式
-        original_style = paragraph.style
-        original_alignment = paragraph.alignment
-
-        # 更简单安全的替换方法：清除所有runs并添加新文本
-        for run in paragraph.runs:
-            run.clear()
+        paragraph = paragraphs[paragraph_index]
 
-        # 清空所有runs后，确保段落内容被清除
-        if paragraph.runs:
-            # 如果仍有runs，直接重新设置text属性
-            paragraph.text = ""
+        # 保留第一个run的字符格式; 段落样式和对齐方式在 pPr 中, 不受影响
+        p_elem = paragraph._p
+        first_run = p_elem.find(qn('w:r'))
+        run_props = first_run.find(qn('w:rPr')) if first_run is not None else None
 
-        # 添加新内容
+        # 一次性移除 pPr 以外的全部内容, 再添加新文本
+        for child in list(p_elem):
+            if child.tag != qn('w:pPr'):
+                p_elem.remove(child)
         run = paragraph.add_run(new_text)
-
-        # 恢复原始样式和格式
-        paragraph.style = original_style
-        paragraph.alignment = original_alignment
+        if run_props is not None:
+            run._r.insert(0, run_props)
 
         # 保存文档
         if save:
-            doc.save(file_path)
+            _write_doc(doc, file_path)
 
         return response_handler({
             "status": "success",
@@ -1102,6 +1777,85 @@ def edit_paragraph_in_document(
         return response_handler({"status": "error", "message": f"编辑Word文档内容时出错: {str(e)}", "data": None})
 
 
+# document.xml 中与段落文本相关的标记: 文本节点、段落结束以及制表符/换行
+_WT_TOKEN_RE = re.compile(r'<w:t(\s[^>]*)?>([^<]*)</w:t>|</w:p>|<w:tab/>|<w:(?:br|cr)(?:\s[^>]*)?/>')
+_DOCUMENT_XML = 'word/document.xml'
+
+
+def _replace_in_document_xml(file_path: str, pattern, replacement: str, save: bool):
+    """
+    直接在 document.xml 的文本节点上做正则替换, 不构建 python-docx 对象树, 且保留各 run 的格式
+
+    :param file_path: 文档路径
+    :param pattern: 已编译的查找正则
+    :param replacement: 替换文本(已转义反斜杠)
+    :param save: 是否写回文件
+    :return: 替换次数; 若有匹配跨越了多个文本节点则返回 None, 由调用方回退到 python-docx
+    """
+    with zipfile.ZipFile(file_path) as zin:
+        xml = zin.read(_DOCUMENT_XML).decode('utf-8')
+
+    total = 0
+    # 当前段落替换前后的文本片段, 以及各节点单独匹配到的次数
+    pieces = []
+    new_pieces = []
+    node_count = 0
+    crossed = False
+
+    def finish_paragraph():
+        # 逐节点替换的结果必须与对整段文本替换的结果完全一致, 否则说明有匹配跨越了节点
+        # (如整词匹配在节点边界产生的假 \b, 或重叠的字面文本)
+        nonlocal node_count, crossed
+        if node_count or pieces:
+            new_text, count = pattern.subn(replacement, ''.join(pieces))
+            if count != node_count or new_text != ''.join(new_pieces):
+                crossed = True
+        pieces.clear()
+        new_pieces.clear()
+        node_count = 0
+
+    def substitute(m):
+        nonlocal total, node_count
+        token = m.group(0)
+        if m.group(2) is None:
+            if token == '</w:p>':
+                finish_paragraph()
+            else:
+                separator = '\t' if token == '<w:tab/>' else '\n'
+                pieces.append(separator)
+                new_pieces.append(separator)
+            return token
+        text = html.unescape(m.group(2))
+        pieces.append(text)
+        new_text, count = pattern.subn(replacement, text)
+        new_pieces.append(new_text)
+        if not count:
+            return token
+        node_count += count
+        total += count
+        attrs = m.group(1) or ''
+        if 'xml:space' not in attrs and new_text != new_text.strip():
+            attrs += ' xml:space="preserve"'
+        return f'<w:t{attrs}>{html.escape(new_text, quote=False)}</w:t>'
+
+    new_xml = _WT_TOKEN_RE.sub(substitute, xml)
+    finish_paragraph()
+    if crossed:
+        return None
+
+    if save and total:
+        data = new_xml.encode('utf-8')
+
+        def write(f):
+            # 源文件在写完临时文件后即关闭, 替换目标文件时不再持有其句柄(Windows 下无法替换已打开的文件)
+            with zipfile.ZipFile(file_path) as zin, zipfile.ZipFile(f, 'w') as zout:
+                for item in zin.infolist():
+                    zout.writestr(item, data if item.filename == _DOCUMENT_XML else zin.read(item))
+
+        _write_file(file_path, write)
+    return total
+
+
 @mcp.tool()
 def find_and_replace_text(
         file_path: str,
@@ -1121,118 +1875,70 @@ def find_and_replace_text(
     :param save: 是否保存更改，默认为True
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
 
     try:
-        # 使用python-docx的方式（更可靠）
-        doc = Document(file_path)
-        replace_count = 0
-
-        # 遍历所有段落和所有run
-        for paragraph in doc.paragraphs:
-            # 获取段落的完整文本
-            full_text = paragraph.text
-            if not match_case:
-                search_text = find_text.lower()
-                full_text_lower = full_text.lower()
-            else:
-                search_text = find_text
-                full_text_lower = full_text
-
-            # 如果段落中包含要查找的文本
-            if search_text in full_text_lower:
-                # 清除所有runs
-                for run in paragraph.runs:
-                    run.clear()
-
-                # 如果需要区分大小写
-                if match_case:
-                    # 直接替换
-                    new_text = full_text.replace(find_text, replace_text)
-                    replace_count += full_text.count(find_text)
-                else:
-                    # 不区分大小写的替换
-                    current_pos = 0
-                    new_text = ""
-                    while True:
-                        # 在剩余文本中查找目标字符串
-                        pos = full_text_lower[current_pos:].find(search_text)
-                        if pos == -1:
-                            # 没有找到更多匹配，添加剩余文本
-                            new_text += full_text[current_pos:]
-                            break
-
-                        # 添加匹配位置之前的文本
-                        new_text += full_text[current_pos:current_pos + pos]
-                        # 添加替换文本
-                        new_text += replace_text
-                        # 更新位置
-                        current_pos += pos + len(find_text)
-                        replace_count += 1
-
-                # 添加新的run，包含替换后的文本
-                paragraph.add_run(new_text)
-
-        # 遍历所有表格单元格
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        # 获取段落的完整文本
-                        full_text = paragraph.text
-                        if not match_case:
-                            search_text = find_text.lower()
-                            full_text_lower = full_text.lower()
-                        else:
-                            search_text = find_text
-                            full_text_lower = full_text
-
-                        # 如果段落中包含要查找的文本
-                        if search_text in full_text_lower:
-                            # 清除所有runs
-                            for run in paragraph.runs:
-                                run.clear()
-
-                            # 如果需要区分大小写
-                            if match_case:
-                                # 直接替换
-                                new_text = full_text.replace(find_text, replace_text)
-                                replace_count += full_text.count(find_text)
-                            else:
-                                # 不区分大小写的替换
-                                current_pos = 0
-                                new_text = ""
-                                while True:
-                                    # 在剩余文本中查找目标字符串
-                                    pos = full_text_lower[current_pos:].find(search_text)
-                                    if pos == -1:
-                                        # 没有找到更多匹配，添加剩余文本
-                                        new_text += full_text[current_pos:]
-                                        break
-
-                                    # 添加匹配位置之前的文本
-                                    new_text += full_text[current_pos:current_pos + pos]
-                                    # 添加替换文本
-                                    new_text += replace_text
-                                    # 更新位置
-                                    current_pos += pos + len(find_text)
-                                    replace_count += 1
-
-                            # 添加新的run，包含替换后的文本
-                            paragraph.add_run(new_text)
+        _BATCHER.flush(file_path)
+        # 查找文本只需折叠一次大小写, 用于快速排除不含查找文本的段落
+        needle = find_text if match_case else find_text.casefold()
+        # 实际替换交给正则引擎; 替换文本按字面处理
+        pattern = _compiled('keyword' if match_whole_word else 'contains', find_text,
+                            0 if match_case else re.IGNORECASE)
+        replacement = replace_text.replace('\\', '\\\\')
+
+        # 先直接在 document.xml 上替换; 有匹配跨越多个run时回退到python-docx按段落替换
+        replace_count = _replace_in_document_xml(file_path, pattern, replacement, save)
+        if replace_count is None:
+            doc = Document(file_path)
+            replace_count = 0
 
-        # 保存文档
-        if save:
-            doc.save(file_path)
+            paragraphs = doc.paragraphs
+
+            # 遍历所有段落和所有run
+            for paragraph in paragraphs:
+                # 获取段落的完整文本
+                full_text = paragraph.text
+
+                # 段落中不包含要查找的文本时直接跳过
+                if needle not in (full_text if match_case else full_text.casefold()):
+                    continue
+
+                new_text, count = pattern.subn(replacement, full_text)
+                if count:
+                    replace_count += count
+                    # 清除所有runs
+                    for run in paragraph.runs:
+                        run.clear()
+                    # 添加新的run，包含替换后的文本
+                    paragraph.add_run(new_text)
+
+            # 遍历所有表格单元格
+            for table in doc.tables:
+                for row in table.rows:
+                    for cell in row.cells:
+                        for paragraph in cell.paragraphs:
+                            # 获取段落的完整文本
+                            full_text = paragraph.text
+
+                            # 段落中不包含要查找的文本时直接跳过
+                            if needle not in (full_text if match_case else full_text.casefold()):
+                                continue
+
+                            new_text, count = pattern.subn(replacement, full_text)
+                            if count:
+                                replace_count += count
+                                # 清除所有runs
+                                for run in paragraph.runs:
+                                    run.clear()
+                                # 添加新的run，包含替换后的文本
+                                paragraph.add_run(new_text)
+
+            # 保存文档
+            if save:
+                _write_doc(doc, file_path)
 
         return response_handler({
             "status": "success",
@@ -1263,29 +1969,25 @@ def delete_paragraph(
     :param save: 是否保存更改，默认为True
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
 
     try:
         # 打开Word文档
+        _BATCHER.flush(file_path)
         doc = Document(file_path)
+        paragraphs = doc.paragraphs
 
         # 检查段落索引是否有效
-        if paragraph_index < 0 or paragraph_index >= len(doc.paragraphs):
+        if paragraph_index < 0 or paragraph_index >= len(paragraphs):
             return response_handler(
-                {"status": "error", "message": f"无效的段落索引 {paragraph_index}，文档共有 {len(doc.paragraphs)} 个段落",
+                {"status": "error", "message": f"无效的段落索引 {paragraph_index}，文档共有 {len(paragraphs)} 个段落",
                  "data": None})
 
         # 获取要删除的段落
-        paragraph = doc.paragraphs[paragraph_index]
+        paragraph = paragraphs[paragraph_index]
 
         # 删除段落
         p = paragraph._element
@@ -1297,7 +1999,7 @@ def delete_paragraph(
 
         # 保存文档
         if save:
-            doc.save(file_path)
+            _write_doc(doc, file_path)
 
         return response_handler({
             "status": "success",
@@ -1327,11 +2029,7 @@ def insert_table_of_contents(
     :param after_paragraph: 在指定段落后插入目录，默认为文档开头第一段后
     """
 
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
@@ -1340,12 +2038,14 @@ def insert_table_of_contents(
         return response_handler({"status": "error", "message": "目录级别数必须在1至9之间", "data": None})
 
     try:
+        _BATCHER.flush(file_path)
         doc = Document(file_path)
+        paragraphs = doc.paragraphs
 
         # 检查指定段落是否有效
-        if after_paragraph >= len(doc.paragraphs):
+        if after_paragraph >= len(paragraphs):
             return response_handler(
-                {"status": "error", "message": f"无效的段落索引 {after_paragraph}，文档共有 {len(doc.paragraphs)} 个段落",
+                {"status": "error", "message": f"无效的段落索引 {after_paragraph}，文档共有 {len(paragraphs)} 个段落",
                  "data": None})
 
         # 在指定位置插入目录标题
@@ -1358,7 +2058,7 @@ def insert_table_of_contents(
                     heading_para._p.addnext(first_para)
         else:
             # 在指定段落后插入
-            paragraph = doc.paragraphs[after_paragraph]
+            paragraph = paragraphs[after_paragraph]
             if title:
                 new_para = doc.add_paragraph()
                 paragraph._p.addnext(new_para._p)
@@ -1374,27 +2074,16 @@ def insert_table_of_contents(
                 else:
                     doc.add_paragraph(toc_para.text)
             else:
-                doc.paragraphs[after_paragraph + 1]._p.addnext(toc_para._p)
+                # 目录标题刚插入在指定段落之后, 目录紧跟标题
+                new_para._p.addnext(toc_para._p)
         else:
             paragraph._p.addnext(toc_para._p)
 
-        toc_run = toc_para.add_run()
-
         # 添加目录字段XML
-        fldChar = OxmlElement('w:fldChar')
-        fldChar.set(qn('w:fldCharType'), 'begin')
-        toc_run._r.append(fldChar)
-
-        instrText = OxmlElement('w:instrText')
-        instrText.text = f' TOC \\o "1-{levels}" \\h '
-        toc_run._r.append(instrText)
-
-        fldChar = OxmlElement('w:fldChar')
-        fldChar.set(qn('w:fldCharType'), 'end')
-        toc_run._r.append(fldChar)
+        toc_para._p.append(_field_run(f' TOC \\o "1-{levels}" \\h '))
 
         # 保存文档
-        doc.save(file_path)
+        _write_doc(doc, file_path)
 
         return response_handler({
             "status": "success",
@@ -1427,11 +2116,7 @@ def add_header_footer(
     :param page_numbers: 是否在页脚添加页码
     """
 
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
@@ -1441,6 +2126,7 @@ def add_header_footer(
         return response_handler({"status": "error", "message": "请至少提供页眉文本、页脚文本或启用页码", "data": None})
 
     try:
+        _BATCHER.flush(file_path)
         doc = Document(file_path)
 
         # 获取所有节
@@ -1470,24 +2156,12 @@ def add_header_footer(
 
                 # 添加页码（python-docx对页码支持有限）
                 if page_numbers:
-                    run = footer_para.add_run()
-
-                    fldChar = OxmlElement('w:fldChar')
-                    fldChar.set(qn('w:fldCharType'), 'begin')
-                    run._r.append(fldChar)
-
-                    instrText = OxmlElement('w:instrText')
-                    instrText.text = ' PAGE '
-                    run._r.append(instrText)
-
-                    fldChar = OxmlElement('w:fldChar')
-                    fldChar.set(qn('w:fldCharType'), 'end')
-                    run._r.append(fldChar)
+                    footer_para._p.append(_field_run(' PAGE '))
 
                     footer_para.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
         # 保存文档
-        doc.save(file_path)
+        _write_doc(doc, file_path)
 
         return response_handler({
             "status": "success",
@@ -1529,13 +2203,7 @@ def set_page_layout(
     :param section_index: 节索引，默认为0（第一节）
     """
 
-    if not os.path.isabs(file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
@@ -1552,6 +2220,7 @@ def set_page_layout(
 
     try:
         # 打开Word文档
+        _BATCHER.flush(file_path)
         doc = Document(file_path)
 
         # 检查节索引是否有效
@@ -1585,7 +2254,7 @@ def set_page_layout(
             section.bottom_margin = Cm(bottom_margin)
 
         # 保存文档
-        doc.save(file_path)
+        _write_doc(doc, file_path)
 
         return response_handler({
             "status": "success",
@@ -1609,21 +2278,17 @@ def set_page_layout(
 @mcp.tool()
 def merge_documents(
         main_file_path: str,
-        files_to_merge: List[str]
+        files_to_merge: List[str],
+        inherit_header_footer: bool = False
 ) -> str:
     """
     合并多个Word文档
     :param main_file_path: 主文档的完整路径或相对于输出目录的路径（合并后的文档将保存为该文件）
     :param files_to_merge: 要合并的文档路径列表
+    :param inherit_header_footer: 是否保留各文档的页眉页脚 (需要 Windows 上安装的 Word), 默认为False
     """
 
-    if not os.path.isabs(main_file_path):
-
-        base_path = os.environ.get('WORD_MCP_PATH')
-        if not base_path:
-            base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-        main_file_path = os.path.join(base_path, main_file_path)
+    main_file_path = _resolve(main_file_path)
 
     if not files_to_merge:
         return response_handler({"status": "error", "message": "请提供至少一个要合并的文档", "data": None})
@@ -1631,22 +2296,23 @@ def merge_documents(
     # 处理文件路径
     processed_files = []
     for file_path in files_to_merge:
-        if not os.path.isabs(file_path):
-
-            base_path = os.environ.get('WORD_MCP_PATH')
-            if not base_path:
-                base_path = os.path.join(os.path.expanduser('~'), '桌面')
-
-            file_path = os.path.join(base_path, file_path)
+        file_path = _resolve(file_path)
 
         if not os.path.exists(file_path):
             return response_handler({"status": "error", "message": f"文件 {file_path} 不存在", "data": None})
 
         processed_files.append(file_path)
 
+    # 合并前写回尚未保存的修改
+    _BATCHER.flush(main_file_path)
+    for file_path in processed_files:
+        _BATCHER.flush(file_path)
+
     try:
-        # 尝试使用Word COM对象合并文档（功能最完整）
+        # 需要保留页眉页脚时, 尝试使用Word COM对象合并文档
         try:
+            if not inherit_header_footer:
+                raise ImportError
             import win32com.client
             import pythoncom
 
@@ -1681,6 +2347,7 @@ def merge_documents(
             doc.Save()
             doc.Close()
             word.Quit()
+            _evict_doc(main_file_path)
 
             pythoncom.CoUninitialize()
 
@@ -1695,54 +2362,27 @@ def merge_documents(
             })
 
         except ImportError:
-            # 使用python-docx方式合并文档（功能受限）
+            # 使用 docxcompose 直接拼接文档内容 (保留样式、表格、图片和编号)
             if os.path.exists(main_file_path):
                 main_doc = Document(main_file_path)
             else:
                 main_doc = Document()
+            composer = Composer(main_doc)
 
             # 记录成功合并的文档数量
             merged_count = 0
 
             # 合并每个文档
             for file_path in processed_files:
-                # 打开要合并的文档
-                doc_to_merge = Document(file_path)
-
                 # 插入分节符（如果不是第一个文档）
                 if merged_count > 0:
                     main_doc.add_section()
 
-                # 复制所有段落
-                for paragraph in doc_to_merge.paragraphs:
-                    new_paragraph = main_doc.add_paragraph()
-                    for run in paragraph.runs:
-                        new_run = new_paragraph.add_run(run.text)
-                        new_run.bold = run.bold
-                        new_run.italic = run.italic
-                        new_run.underline = run.underline
-                        if run.font.size:
-                            new_run.font.size = run.font.size
-                        if run.font.name:
-                            new_run.font.name = run.font.name
-
-                    new_paragraph.style = paragraph.style
-                    new_paragraph.alignment = paragraph.alignment
-
-                # 复制所有表格
-                for table in doc_to_merge.tables:
-                    new_table = main_doc.add_table(rows=len(table.rows), cols=len(table.columns))
-                    new_table.style = table.style
-
-                    for i, row in enumerate(table.rows):
-                        for j, cell in enumerate(row.cells):
-                            if i < len(new_table.rows) and j < len(new_table.rows[i].cells):
-                                new_table.rows[i].cells[j].text = cell.text
-
+                composer.append(Document(file_path))
                 merged_count += 1
 
             # 保存合并后的文档
-            main_doc.save(main_file_path)
+            _write_doc(main_doc, main_file_path)
 
             return response_handler({
                 "status": "success",
@@ -1777,15 +2417,13 @@ def complex_query(file_path: str, query: str):
     from docx import Document
 
     # 路径标准化处理
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH', os.path.expanduser('~/桌面'))
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": "文件不存在"})
 
     try:
-        doc = Document(file_path)
+        doc = _load_doc(file_path)
     except Exception as e:
         return response_handler({"status": "error", "message": f"文档解析失败: {str(e)}"})
 
@@ -1806,50 +2444,54 @@ def complex_query(file_path: str, query: str):
 
     try:
         # 处理不同查询类型
-        if query_type == 'regex':
-            pattern = re.compile(search_pattern, flags)
-        elif query_type in ('keyword', 'contains'):
-            escaped = re.escape(search_pattern)
-            pattern = re.compile(rf'\b{escaped}\b' if query_type == 'keyword' else escaped, flags)
+        if query_type in ('regex', 'keyword', 'contains'):
+            pattern = _compiled(query_type, search_pattern, flags)
         else:  # 统计类查询
             pass
 
         # 文本内容查询逻辑
         if query_type in ('regex', 'keyword', 'contains'):
-            # 遍历段落
-            for para_idx, para in enumerate(doc.paragraphs):
-                text = para.text.strip()
-                if matches := pattern.findall(text):
-                    result["total"] += len(matches)
-                    result["details"].append({
-                        "type": "paragraph",
-                        "index": para_idx,
-                        "text_snippet": text[:50] + "..." if len(text) > 50 else text,
-                        "matches": matches
-                    })
+            # 遍历段落; 字面查询对所有段落只执行一次匹配
+            texts = [para.text.strip() for para in doc.paragraphs]
+            joined = query_type != 'regex' and _TEXT_SEP not in search_pattern
+            for para_idx, matches in _findall_each(pattern, texts, joined):
+                text = texts[para_idx]
+                result["total"] += len(matches)
+                result["details"].append({
+                    "type": "paragraph",
+                    "index": para_idx,
+                    "text_snippet": text[:50] + "..." if len(text) > 50 else text,
+                    "matches": matches
+                })
 
-            # 遍历表格
+            # 遍历表格: 先收集所有单元格文本及其位置, 同样只做一次匹配
+            positions = []
+            texts = []
             for table_idx, table in enumerate(doc.tables):
                 for row_idx, row in enumerate(table.rows):
                     for cell_idx, cell in enumerate(row.cells):
-                        text = cell.text.strip()
-                        if matches := pattern.findall(text):
-                            result["total"] += len(matches)
-                            result["details"].append({
-                                "type": "table",
-                                "position": f"Table-{table_idx} Cell({row_idx},{cell_idx})",
-                                "text_snippet": text[:50] + "..." if len(text) > 50 else text,
-                                "matches": matches
-                            })
+                        positions.append(f"Table-{table_idx} Cell({row_idx},{cell_idx})")
+                        texts.append(_cell_text(cell).strip())
+
+            for cell_pos, matches in _findall_each(pattern, texts, joined):
+                text = texts[cell_pos]
+                result["total"] += len(matches)
+                result["details"].append({
+                    "type": "table",
+                    "position": positions[cell_pos],
+                    "text_snippet": text[:50] + "..." if len(text) > 50 else text,
+                    "matches": matches
+                })
 
         # 元素统计查询逻辑
         elif query_type == 'raw':
+            # 直接用 XPath 计数, 统计口径与 query_document_info 相同
             if query == 'tables':
-                result["elements"]["tables"] = len(doc.tables)
+                result["elements"]["tables"] = _count(doc.element.body, "w:tbl")
             elif query == 'images':
-                result["elements"]["images"] = len(doc.inline_shapes)
+                result["elements"]["images"] = _count(doc.element, "./w:body//w:p/w:r/w:drawing/wp:inline")
             elif query == 'paragraphs':
-                result["elements"]["paragraphs"] = len(doc.paragraphs)
+                result["elements"]["paragraphs"] = _count(doc.element.body, "w:p")
             else:
                 return response_handler({"status": "error", "message": "不支持的查询类型"})
 
@@ -1881,9 +2523,7 @@ def complex_replace(file_path: str, replace: str, output_path: str = None):
     """
 
     # 路径处理
-    if not os.path.isabs(file_path):
-        base_path = os.environ.get('WORD_MCP_PATH', os.path.expanduser('~/桌面'))
-        file_path = os.path.join(base_path, file_path)
+    file_path = _resolve(file_path)
 
     if not os.path.exists(file_path):
         return response_handler({"status": "error", "message": "文件不存在"})
@@ -1894,6 +2534,7 @@ def complex_replace(file_path: str, replace: str, output_path: str = None):
         output_path = f"{base_name}_modified{ext}"
 
     try:
+        _BATCHER.flush(file_path)
         doc = Document(file_path)
     except Exception as e:
         return response_handler({"status": "error", "message": f"文档加载失败: {str(e)}"})
@@ -1915,75 +2556,72 @@ def complex_replace(file_path: str, replace: str, output_path: str = None):
         search_pattern, replacement = replace.split('=', 1)
 
     # 构建替换模式
+    if replace_type not in ("regex", "keyword", "contains"):
+        return response_handler({"status": "error", "message": "不支持的替换类型"})
     try:
-        if replace_type == "regex":
-            pattern = re.compile(search_pattern, flags)
-        elif replace_type == "keyword":
-            pattern = re.compile(rf'\b{re.escape(search_pattern)}\b', flags)
-        elif replace_type == "contains":
-            pattern = re.compile(re.escape(search_pattern), flags)
-        else:
-            return response_handler({"status": "error", "message": "不支持的替换类型"})
+        pattern = _compiled(replace_type, search_pattern, flags)
     except re.error as e:
         return response_handler({"status": "error", "message": f"正则表达式错误: {str(e)}"})
 
     replace_count = 0
+    # 查找文本不含有大小写之分的字符(如中文、数字)时, 不区分大小写的包含替换等同于字面替换, 直接用 str.replace;
+    # 替换文本含反斜杠时仍按正则模板处理
+    literal = (replace_type == "contains" and search_pattern == search_pattern.lower() == search_pattern.upper()
+               and '\\' not in replacement)
 
     def process_run(run):
         """处理单个 run 对象，保留样式"""
         nonlocal replace_count
         original = run.text
-        if not original:
+        # 字面查询(大小写折叠不改变长度)时, 比查找文本短的 run 不可能匹配
+        if not original or (replace_type != "regex" and len(original) < len(search_pattern)):
             return
 
         # 替换文本
-        new_text, count = pattern.subn(replacement, original)
-        if count > 0:
-            # 保留样式
-            new_run = run._element.addprevious(run._element._new())
-            new_run.text = new_text
-            new_run.rPr = run._element.rPr.clone()
-
-            # 更新 run 的文本
-            run.text = ""
-            replace_count += count
-
-    def process_paragraph(para):
-        """处理段落中的所有 run"""
+        if literal:
+            count = original.count(search_pattern)
+            if not count:
+                return
+            new_text = original.replace(search_pattern, replacement)
+        else:
+            # 大多数 run 没有匹配, 先用 search 排除, 命中时才构造替换结果
+            if pattern.search(original) is None:
+                return
+            new_text, count = pattern.subn(replacement, original)
+
+        # run.text 只替换文本内容, rPr 中的样式保持不变
+        run.text = new_text
+        replace_count += count
+
+    def iter_paragraphs():
+        """按正文、表格、页眉页脚的顺序产出所有待处理段落"""
+        yield from doc.paragraphs
+        # 用队列逐层展开嵌套表格, 不做递归调用
+        tables = deque(doc.tables)
+        while tables:
+            table = tables.popleft()
+            for row in table.rows:
+                for cell in row.cells:
+                    # 处理单元格段落
+                    yield from cell.paragraphs
+                    # 嵌套表格排到队尾
+                    tables.extend(cell.tables)
+        for section in doc.sections:
+            for part in (section.header, section.first_page_header, section.footer, section.first_page_footer):
+                yield from part.paragraphs
+
+    # 合并单元格会在 row.cells 中重复出现, 同一段落只处理一次
+    seen = set()
+    for para in iter_paragraphs():
+        if para._p in seen:
+            continue
+        seen.add(para._p)
         for run in list(para.runs):
             process_run(run)
 
-    # 处理正文段落
-    for para in doc.paragraphs:
-        process_paragraph(para)
-
-    # 处理表格
-    def process_table(table):
-        for row in table.rows:
-            for cell in row.cells:
-                # 处理单元格段落
-                for para in cell.paragraphs:
-                    process_paragraph(para)
-                # 处理嵌套表格
-                if cell.tables:
-                    for nested_table in cell.tables:
-                        process_table(nested_table)
-
-    for table in doc.tables:
-        process_table(table)
-
-    # 处理页眉页脚
-    for section in doc.sections:
-        for header in [section.header, section.first_page_header]:
-            for para in header.paragraphs:
-                process_paragraph(para)
-        for footer in [section.footer, section.first_page_footer]:
-            for para in footer.paragraphs:
-                process_paragraph(para)
-
     # 保存文档
     try:
-        doc.save(output_path)
+        _write_doc(doc, output_path)
     except PermissionError:
         return response_handler({"status": "error", "message": "文件写入权限被拒绝"})
     except Exception as e:
@@ -2018,11 +2656,11 @@ def extract_keywords(text, is_chinese=False, top_n=10):
     """
 
     if is_chinese:
-        words = jieba.lcut(text)
-        # 过滤标点符号和空格
-        words = [word for word in words if word.strip() and not re.match(r'^[\u4e00-\u9fa5]+$', word)]
+        # 过滤标点符号和空格, 分词结果直接流入计数器, 不再生成中间列表;
+        # 整篇文本不经过 _cut 的缓存, 避免长期占用内存
+        words = (word for word in _get_jieba().cut(text, HMM=True) if word.strip() and not _CJK_ONLY.match(word))
     else:
-        words = re.findall(r'\b\w+\b', text.lower())
+        words = _WORD_EN.findall(text.lower())
 
     word_counts = Counter(words)
     return word_counts.most_common(top_n)
@@ -2037,7 +2675,7 @@ def extract_document_info(file_path, is_chinese=False, top_n=10, extract_content
     :param top_n: 返回的关键词数量
     :param extract_content: 要提取内容，默认全部内容
     """
-    doc = Document(file_path)
+    doc = _load_doc(file_path)
 
     if extract_content is None:
         extract_content = ['paragraphs', 'tables', 'images', 'headings', 'text', 'keywords']
@@ -2046,24 +2684,48 @@ def extract_document_info(file_path, is_chinese=False, top_n=10, extract_content
     tables = []
     images = []
     headings = []
-    text = ""
+    # 文本片段先收集到列表, 最后一次性拼接
+    text_parts = []
     keywords = []
     word_count = 0
 
-    if 'paragraphs' in extract_content:
+    want_paragraphs = 'paragraphs' in extract_content
+    want_headings = 'headings' in extract_content
+    # 标题文本排在表格文本之后, 与原先的拼接顺序保持一致
+    heading_parts = []
+
+    if want_headings:
+        # 段落样式 id -> 样式名只查一次; 未指定或找不到的样式 id 与 python-docx 一样按默认段落样式处理
+        style_names = {style.style_id: style.name for style in doc.styles if style.type == WD_STYLE_TYPE.PARAGRAPH}
+        default_style = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+        default_name = default_style.name if default_style is not None else ""
+
+    # 段落和标题在同一次遍历中提取
+    if want_paragraphs or want_headings:
         for para in doc.paragraphs:
-            para_text = para.text.strip()
-            if para_text:
-                paragraphs.append(para_text)
-                text += para_text + " "
+            raw_text = para.text
+            if want_paragraphs:
+                para_text = raw_text.strip()
+                if para_text:
+                    paragraphs.append(para_text)
+                    text_parts.append(para_text)
+            if want_headings:
+                style_name = style_names.get(para._p.style, default_name)
+                if style_name.startswith("Heading"):
+                    level = int(style_name.replace("Heading", "").strip())
+                    headings.append({
+                        "text": raw_text.strip(),
+                        "level": level
+                    })
+                    heading_parts.append(raw_text)
 
     if 'tables' in extract_content:
         for table in doc.tables:
             table_data = []
             for row in table.rows:
-                row_data = [cell.text.strip() for cell in row.cells]
+                row_data = [_cell_text(cell).strip() for cell in row.cells]
                 table_data.append(row_data)
-                text += " ".join(row_data) + " "
+                text_parts.append(" ".join(row_data))
             tables.append(table_data)
 
     if 'images' in extract_content:
@@ -2075,15 +2737,10 @@ def extract_document_info(file_path, is_chinese=False, top_n=10, extract_content
                     "path": rel.target_ref
                 })
 
-    if 'headings' in extract_content:
-        for para in doc.paragraphs:
-            if para.style.name.startswith("Heading"):
-                level = int(para.style.name.replace("Heading", "").strip())
-                headings.append({
-                    "text": para.text.strip(),
-                    "level": level
-                })
-                text += para.text + " "
+    text_parts.extend(heading_parts)
+
+    # 与逐段追加 "片段 + 空格" 的结果一致(中文字数按字符计, 包含这些空格)
+    text = " ".join(text_parts) + " " if text_parts else ""
 
     if 'text' in extract_content:
         word_count = count_words(text, is_chinese)
@@ -2115,18 +2772,26 @@ def save_to_json(data, output_dir="output", filename="document_info.json"):
     try:
         os.makedirs(output_dir, exist_ok=True)
         output_path = os.path.join(output_dir, filename)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
+        # orjson 直接生成 UTF-8 字节, 以二进制方式写入
+        with open(output_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
     except Exception as e:
         return response_handler({"status": "error", "message": f"保存失败: {str(e)}"})
 
     return response_handler({"status": "success", "message": f"结果已保存到 {output_path}"})
 
 
+def _open_csv(path: str):
+    """
+    以带 BOM 的 UTF-8 和 1 MiB 写缓冲打开 CSV 文件, 便于 Excel 直接识别编码
+    """
+    return open(path, "w", newline="", encoding="utf-8-sig", buffering=1 << 20)
+
+
 @mcp.tool()
 def save_to_csv(data, output_dir: str = "output"):
     """
-    将提取的信息保存为 CSV 格式
+    将提取的信息保存为 CSV 格式, 所有表格写入同一个 tables_all.csv, 每行第一列为表格序号(从1开始)
     :param data: 提取的文档信息
     :param output_dir: 输出目录
     """
@@ -2137,39 +2802,39 @@ def save_to_csv(data, output_dir: str = "output"):
         # 保存段落
         if "paragraphs" in data and data["paragraphs"]:
             paragraphs_path = os.path.join(output_dir, "paragraphs.csv")
-            with open(paragraphs_path, "w", newline="", encoding="utf-8-sig") as f:
+            with _open_csv(paragraphs_path) as f:
                 writer = csv.writer(f)
                 writer.writerow(["paragraph"])
                 writer.writerows([[para] for para in data["paragraphs"]])
 
         # 保存表格
         if "tables" in data and data["tables"]:
-            for i, table in enumerate(data["tables"]):
-                table_path = os.path.join(output_dir, f"table_{i + 1}.csv")
-                with open(table_path, "w", newline="", encoding="utf-8-sig") as f:
-                    writer = csv.writer(f)
-                    writer.writerows(table)
+            tables_path = os.path.join(output_dir, "tables_all.csv")
+            with _open_csv(tables_path) as f:
+                writer = csv.writer(f)
+                for i, table in enumerate(data["tables"], 1):
+                    writer.writerows([i, *row] for row in table)
 
         # 保存图片信息
         if "images" in data and data["images"]:
             images_path = os.path.join(output_dir, "images.csv")
-            with open(images_path, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.DictWriter(f, fieldnames=["index", "filename", "path"])
-                writer.writeheader()
-                writer.writerows(data["images"])
+            with _open_csv(images_path) as f:
+                writer = csv.writer(f)
+                writer.writerow(["index", "filename", "path"])
+                writer.writerows((image["index"], image["filename"], image["path"]) for image in data["images"])
 
         # 保存标题
         if "headings" in data and data["headings"]:
             headings_path = os.path.join(output_dir, "headings.csv")
-            with open(headings_path, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.DictWriter(f, fieldnames=["text", "level"])
-                writer.writeheader()
-                writer.writerows(data["headings"])
+            with _open_csv(headings_path) as f:
+                writer = csv.writer(f)
+                writer.writerow(["text", "level"])
+                writer.writerows((heading["text"], heading["level"]) for heading in data["headings"])
 
         # 保存关键词
         if "keywords" in data and data["keywords"]:
             keywords_path = os.path.join(output_dir, "keywords.csv")
-            with open(keywords_path, "w", newline="", encoding="utf-8-sig") as f:
+            with _open_csv(keywords_path) as f:
                 writer = csv.writer(f)
                 writer.writerow(["word", "frequency"])
                 writer.writerows(data["keywords"])
@@ -2188,8 +2853,8 @@ def compare_documents(doc1_path: str, doc2_path: str):
     :param doc2_path: 第二个文档路径
     """
     try:
-        doc1 = Document(doc1_path)
-        doc2 = Document(doc2_path)
+        doc1 = _load_doc(doc1_path)
+        doc2 = _load_doc(doc2_path)
     except Exception as e:
         return response_handler({"error": f"无法加载文档: {str(e)}"})
 
@@ -2218,15 +2883,23 @@ def compare_documents(doc1_path: str, doc2_path: str):
             "font_size": para.runs[0].font.size.pt if para.runs and para.runs[0].font.size else None
         })
 
-    # 使用 diff 算法比较段落
-    differ = difflib.Differ()
-    diff_result = list(differ.compare([p["text"] for p in doc1_paragraphs], [p["text"] for p in doc2_paragraphs]))
-
-    for line in diff_result:
-        if line.startswith('+'):
-            differences["added_paragraphs"].append(line[2:])
-        elif line.startswith('-'):
-            differences["deleted_paragraphs"].append(line[2:])
+    # 使用 diff 算法比较段落: 直接取编辑操作, 不做 Differ 的逐字符相似度计算
+    texts1 = [p["text"] for p in doc1_paragraphs]
+    texts2 = [p["text"] for p in doc2_paragraphs]
+    if Levenshtein is not None:
+        opcodes = Levenshtein.opcodes(texts1, texts2)
+    else:
+        opcodes = difflib.SequenceMatcher(None, texts1, texts2).get_opcodes()
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            continue
+        # 替换块中一一对应的段落视为修改, 多出的部分视为新增或删除
+        paired = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+        for old, new in zip(texts1[i1:i1 + paired], texts2[j1:j1 + paired]):
+            differences["modified_paragraphs"].append({"original": old, "modified": new})
+        differences["deleted_paragraphs"].extend(texts1[i1 + paired:i2])
+        differences["added_paragraphs"].extend(texts2[j1 + paired:j2])
 
     # 比较格式差异
     for i in range(min(len(doc1_paragraphs), len(doc2_paragraphs))):
@@ -2252,33 +2925,38 @@ def assess_document_quality(file_path: str, is_chinese: bool = False):
     :param is_chinese: 是否中文文档
     """
     try:
-        doc = Document(file_path)
+        doc = _load_doc(file_path)
     except Exception as e:
         return response_handler({"error": f"无法加载文档: {str(e)}"})
 
     # 提取文本内容
-    text = ""
-    for para in doc.paragraphs:
-        text += para.text + " "
+    texts = [para.text for para in doc.paragraphs]
+    text = " ".join(texts) + " " if texts else ""
 
     # 可读性评估
-    sentences = re.split(r'[。！？]', text) if is_chinese else re.split(r'[.!?]', text)
+    sentences = (_SENT_ZH if is_chinese else _SENT_EN).split(text)
     avg_sentence_length = sum(len(s) for s in sentences if s) / len([s for s in sentences if s]) if sentences else 0
 
-    # 使用更复杂的可读性指标
-    readability_score = calculate_readability(text, is_chinese)
+    # 使用更复杂的可读性指标, 复用上面已切分好的句子
+    readability_score = calculate_readability(text, is_chinese, sentences)
 
-    # 格式一致性评估
+    # 格式一致性评估: 对齐方式记为枚举值(未设置为 -1), 字号记为 EMU 整数, 再用 numpy 统计
     alignments = []
     font_sizes = []
     for para in doc.paragraphs:
-        alignments.append(str(para.alignment))
+        alignment = para.alignment
+        alignments.append(-1 if alignment is None else int(alignment))
         for run in para.runs:
             if run.font.size:
-                font_sizes.append(run.font.size.pt)
+                font_sizes.append(run.font.size)
 
-    alignment_counts = Counter(alignments)
-    font_size_counts = Counter(font_sizes)
+    values, counts = np.unique(np.array(alignments, dtype=np.int8), return_counts=True)
+    alignment_counts = {
+        "None" if value < 0 else str(WD_ALIGN_PARAGRAPH(value)): count
+        for value, count in zip(values.tolist(), counts.tolist())
+    }
+    values, counts = np.unique(np.array(font_sizes, dtype=np.int64), return_counts=True)
+    font_size_counts = {Length(value).pt: count for value, count in zip(values.tolist(), counts.tolist())}
 
     quality_report = {
         "readability": {
@@ -2294,26 +2972,28 @@ def assess_document_quality(file_path: str, is_chinese: bool = False):
     return response_handler(quality_report)
 
 
-def calculate_readability(text: str, is_chinese: bool = False) -> float:
+def calculate_readability(text: str, is_chinese: bool = False, sentences: List[str] = None) -> float:
     """
     计算文本的可读性评分
     :param text: 输入文本
     :param is_chinese: 是否中文文档
+    :param sentences: 已按句末标点切分好的句子列表, 不传则从 text 切分
     :return: 可读性评分（0-100，分数越高越易读）
     """
     if not text:
         return 0.0
 
+    if sentences is None:
+        sentences = (_SENT_ZH if is_chinese else _SENT_EN).split(text)
+
     if is_chinese:
         # 中文可读性评估（示例：基于词汇复杂度和句子长度）
-        import jieba
-        sentences = re.split(r'[。！？]', text)
         sentences = [s for s in sentences if s.strip()]
         if not sentences:
             return 0.0
 
         avg_sentence_length = sum(len(s) for s in sentences) / len(sentences)
-        words = [word for sentence in sentences for word in jieba.lcut(sentence)]
+        words = [word for sentence in sentences for word in _cut(sentence)]
         unique_words = set(words)
         lexical_diversity = len(unique_words) / len(words) if words else 0
 
@@ -2323,13 +3003,12 @@ def calculate_readability(text: str, is_chinese: bool = False) -> float:
 
     else:
         # 英文可读性评估（Flesch-Kincaid 可读性评分）
-        sentences = re.split(r'[.!?]', text)
         sentences = [s for s in sentences if s.strip()]
         if not sentences:
             return 0.0
 
-        words = re.findall(r'\b\w+\b', text.lower())
-        syllables = sum(count_syllables(word) for word in words)
+        words = _WORD_EN.findall(text.lower())
+        syllables = _count_syllables_total(words)
 
         avg_sentence_length = len(words) / len(sentences)
         avg_syllables_per_word = syllables / len(words) if words else 0
@@ -2366,14 +3045,46 @@ def count_syllables(word: str) -> int:
     return max(count, 1)
 
 
+# 元音查找表, 下标为 latin-1 字节值
+_VOWELS = np.zeros(256, dtype=np.bool_)
+_VOWELS[list(b"aeiouy")] = True
+
+
+def _count_syllables_total(words: List[str]) -> int:
+    """
+    一次性统计所有(已小写的)英文单词的音节总数, 结果与逐词调用 count_syllables 相同
+    :param words: 单词列表
+    :return: 音节总数
+    """
+    if not words:
+        return 0
+
+    # 单词之间用空格分隔, 元音段不会跨越单词; latin-1 编码保证每个字符恰好一个字节
+    arr = np.frombuffer(" ".join(words).encode("latin-1", "replace"), dtype=np.uint8)
+    is_vowel = _VOWELS[arr]
+    # 元音段的起点: 当前是元音且前一个字符不是元音
+    run_starts = is_vowel.copy()
+    run_starts[1:] &= ~is_vowel[:-1]
+
+    lengths = np.fromiter((len(word) for word in words), dtype=np.int64, count=len(words))
+    starts = np.zeros(len(words), dtype=np.int64)
+    np.cumsum(lengths[:-1] + 1, out=starts[1:])
+    counts = np.add.reduceat(run_starts.astype(np.int64), starts)
+    # 去掉结尾的 "e" 音节, 每个单词至少一个音节
+    counts -= arr[starts + lengths - 1] == ord("e")
+    return int(np.maximum(counts, 1).sum())
+
+
 def response_handler(response):
-    return json.dumps(response, ensure_ascii=False, allow_nan=False, indent=None, separators=(',', ':'))
+    return orjson.dumps(response, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
-# 中文字符不被转义 ensure_ascii=False
-# 格式紧凑 indent=None , separators=(",", ":")
-# 严格性 allow_nan=False
+# 使用 orjson 序列化, 输出为 UTF-8, 中文字符不被转义
+# 格式紧凑, 与 separators=(",", ":") 一致
+# 非字符串键 (如 int) 按 json 的方式转为字符串 OPT_NON_STR_KEYS
 
 if __name__ == "__main__":
     print("word_mcp is running...")
+    # 后台预热中文分词词典, 不阻塞服务启动
+    threading.Thread(target=_get_jieba, name="jieba-init", daemon=True).start()
     mcp.run()
\ No newline at end of file